@@ -31,6 +31,7 @@ default_map_settings = {
         "zoom": 7,
     },
     "fitSource": False,
+    "bboxStrategy": False,
     "fitMaxZoom": 14,
     "focusOnly": False,
     "geolocationTooltip": _("Zoom to current location"),
@@ -65,6 +66,7 @@ def includeme(config: pyramid.config.Configurator) -> None:
     config.include("pyramid_chameleon")
     config.include("pyramid_beaker")  # use Beaker for session storage
     config.include(".routes")
+    config.include(".renderers")
     config.include(".views")
     config.add_static_view("c2cgeoform_static", "static", cache_max_age=3600)
     config.add_static_view("deform_static", "deform:static")
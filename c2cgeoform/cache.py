@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from io import BufferedReader
+from pathlib import Path
+from typing import IO, Any
+
+
+class TTLCache:
+    """
+    A thread-safe cache with a time to live and a maximum number of entries.
+
+    When full, the least recently used entry is evicted.
+
+    Example usage
+
+    .. code-block:: python
+
+        cache = TTLCache(ttl=60, maxsize=128)
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value)
+    """
+
+    def __init__(self, ttl: float = 60, maxsize: int = 128) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DirectoryCache:
+    """
+    Files in a directory, that can be shared by several workers (or hosts).
+
+    The files are written in a temporary file then renamed, so the other workers never see a partial
+    file. Reading a file postpones its removal, the files not accessed since ``ttl`` seconds are removed,
+    at most every ``ttl / 10`` seconds, when a new file is written. The names starting with a dot are
+    reserved (temporary files and the marker of the last collection).
+
+    Example usage
+
+    .. code-block:: python
+
+        cache = DirectoryCache("/var/cache/example", ttl=3600)
+        cache.write("name", b"content")
+        content = cache.read("name")
+    """
+
+    def __init__(self, directory: str | Path, ttl: float) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def path(self, name: str) -> Path:
+        return self.directory / Path(name).name
+
+    def open(self, name: str) -> BufferedReader:
+        """Open a file, raise ``FileNotFoundError`` when it does not exist (anymore)."""
+        path = self.path(name)
+        os.utime(path)
+        return path.open("rb")
+
+    def read(self, name: str) -> bytes | None:
+        try:
+            with self.open(name) as file_:
+                return file_.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name: str, data: bytes | IO[bytes]) -> None:
+        """Write a file from its content or from a file, read from its current position."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._collect_if_needed()
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=".", delete=False) as file_:
+            if isinstance(data, bytes):
+                file_.write(data)
+            else:
+                shutil.copyfileobj(data, file_)
+        Path(file_.name).replace(self.path(name))
+
+    def _collect_if_needed(self) -> None:
+        marker = self.directory / ".collected"
+        try:
+            if marker.stat().st_mtime > time.time() - self.ttl / 10:
+                return
+        except FileNotFoundError:
+            pass
+        marker.touch()
+        self.collect()
+
+    def collect(self) -> None:
+        """Remove the files not accessed since ``ttl`` seconds."""
+        limit = time.time() - self.ttl
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                if path.stat().st_mtime < limit:
+                    path.unlink()
+            except FileNotFoundError:
+                pass  # Removed by another worker
@@ -1,17 +1,33 @@
 import io
 import json
 import os
-from collections.abc import Buffer
+from collections.abc import Buffer, Callable
 from io import BytesIO
 from typing import Any
 
 import colander
-import pyproj
 from colander import Invalid, SchemaType
 from geoalchemy2 import WKBElement
 from geoalchemy2.shape import from_shape, to_shape
-from shapely.geometry import mapping, shape
-from shapely.ops import transform
+from sqlalchemy import func, inspect, select
+from sqlalchemy.sql import ClauseElement
+from translationstring import TranslationString, TranslationStringFactory
+
+from c2cgeoform.ext.pyproj_ext import get_transformer, transform_geometry
+from c2cgeoform.ext.shapely_ext import from_geojson, round_coordinates, to_geojson
+
+_ = TranslationStringFactory("c2cgeoform")
+
+
+def file_too_large_message(max_size: int | str) -> TranslationString:
+    """Get the error message of a file larger than ``max_size`` bytes, also used by the upload widget."""
+    return _("The file is too large, the maximum size is ${max_size} bytes.", mapping={"max_size": max_size})
+
+
+class GeoJSONFragment(str):
+    """A geometry already encoded in GeoJSON, e.g. by ``ST_AsGeoJSON``, used as is by ``Geometry``."""
+
+    __slots__ = ()
 
 
 class Geometry(SchemaType):  # type: ignore[misc]
@@ -42,27 +58,49 @@ class Geometry(SchemaType):  # type: ignore[misc]
         The projection used for the OpenLayers map. The geometries will be
         reprojected to this projection.
 
+    db_encoding
+        Let the views select the geometries encoded in GeoJSON by the database
+        (with ``ST_AsGeoJSON``, see ``geojson_expression``) with the object they
+        edit, instead of encoding them in Python. Only for the geometries
+        directly in the schema of the views.
+
+    max_decimal_digits
+        Round the serialized coordinates to this number of decimal digits. By
+        default, they are not rounded in Python and rounded to 9 digits when
+        encoded in the database. The stored geometries are not rounded, see
+        ``is_unchanged``.
+
     """
 
-    def __init__(self, geometry_type: str = "GEOMETRY", srid: int = -1, map_srid: int = -1) -> None:
+    def __init__(
+        self,
+        geometry_type: str = "GEOMETRY",
+        srid: int = -1,
+        map_srid: int = -1,
+        db_encoding: bool = False,
+        max_decimal_digits: int | None = None,
+    ) -> None:
         self.geometry_type = geometry_type.upper()
         self.srid = int(srid)
         self.map_srid = int(map_srid)
+        self.db_encoding = db_encoding
+        self.max_decimal_digits = max_decimal_digits
         if self.map_srid == -1:
             self.map_srid = self.srid
 
-        if self.srid != self.map_srid:
-            self.project_db_to_map = pyproj.Transformer.from_crs(
-                self.srid,
-                self.map_srid,
-                always_xy=True,
-            ).transform
-
-            self.project_map_to_db = pyproj.Transformer.from_crs(
-                self.map_srid,
-                self.srid,
-                always_xy=True,
-            ).transform
+    @property
+    def project_db_to_map(self) -> Callable[..., Any]:
+        return get_transformer(self.srid, self.map_srid).transform
+
+    @property
+    def project_map_to_db(self) -> Callable[..., Any]:
+        return get_transformer(self.map_srid, self.srid).transform
+
+    def geojson_expression(self, column: Any) -> Any:
+        """Get the SQL expression of the geometry ``column`` encoded in GeoJSON in the map projection."""
+        if self.map_srid != self.srid:
+            column = func.ST_Transform(column, self.map_srid)
+        return func.ST_AsGeoJSON(column, 9 if self.max_decimal_digits is None else self.max_decimal_digits)
 
     def serialize(self, node: Any, appstruct: colander._null | WKBElement) -> colander._null | str:
         """
@@ -74,12 +112,16 @@ class Geometry(SchemaType):  # type: ignore[misc]
         """
         if appstruct is colander.null:
             return colander.null
+        if isinstance(appstruct, GeoJSONFragment):
+            return appstruct
         if isinstance(appstruct, WKBElement):
             geometry = to_shape(appstruct)
             if self.map_srid not in (self.srid, appstruct.srid):
-                geometry = transform(self.project_db_to_map, geometry)
+                geometry = transform_geometry(geometry, self.srid, self.map_srid)
+            if self.max_decimal_digits is not None:
+                geometry = round_coordinates(geometry, self.max_decimal_digits)
 
-            return json.dumps(mapping(geometry))
+            return to_geojson(geometry)
         raise Invalid(node, f"Unexpected value: {appstruct!r}")
 
     def deserialize(self, node: Any, cstruct: colander._null | str) -> colander._null | str:
@@ -93,17 +135,64 @@ class Geometry(SchemaType):  # type: ignore[misc]
         if cstruct is colander.null or cstruct == "":
             return colander.null
         try:
-            # TODO: see https://github.com/Toblerity/Shapely/issues/115  # pylint: disable=fixme
-            # Shapely does not support loading GeometryCollections from GeoJSON,
-            geometry = shape(json.loads(cstruct))
+            geometry = from_geojson(cstruct)
         except Exception as exception:
             raise Invalid(node, f"Invalid geometry: {cstruct!r}") from exception
 
         if self.srid != self.map_srid:
-            geometry = transform(self.project_map_to_db, geometry)
+            geometry = transform_geometry(geometry, self.map_srid, self.srid)
 
         return from_shape(geometry, srid=self.srid)
 
+    def is_unchanged(self, node: Any, appstruct: colander._null | WKBElement, cstruct: Any) -> bool:
+        """
+        Check if ``cstruct`` is the serialization of ``appstruct``.
+
+        Used to keep the stored geometries when a form is submitted without modifying them, as their
+        serialization may have been rounded.
+        """
+        if appstruct is None or appstruct is colander.null or not isinstance(cstruct, str):
+            return False
+        try:
+            return json.loads(self.serialize(node, appstruct)) == json.loads(cstruct)  # type: ignore[no-any-return]
+        except ValueError:
+            return False
+
+
+class BinaryDataCopy:
+    """
+    Value of a ``BinaryData`` node whose content is copied in the database from the row ``identity``.
+
+    Used for the duplicated records, so the content is not loaded.
+    """
+
+    _INFO_KEY = "c2cgeoform_copy_source"
+
+    def __init__(self, identity: tuple[Any, ...]) -> None:
+        self.identity = tuple(identity)
+
+    @classmethod
+    def mark(cls, copy: Any, source: Any) -> None:
+        """Record that the entity ``copy`` is a copy of the persistent entity ``source``."""
+        inspect(copy).info[cls._INFO_KEY] = inspect(source).identity
+
+    @classmethod
+    def source_of(cls, copy: Any) -> "BinaryDataCopy | None":
+        """Get the source of the entity ``copy``, ``None`` if it is not a copy."""
+        identity = inspect(copy).info.get(cls._INFO_KEY)
+        return None if identity is None else cls(identity)
+
+    def expression(self, model: type[Any], key: str) -> ClauseElement:
+        """Get the subquery selecting the column ``key`` of the source row, to be assigned to a copy."""
+        mapper = inspect(model)
+        return (
+            select(getattr(model, key))
+            .where(
+                *[column == value for column, value in zip(mapper.primary_key, self.identity, strict=True)]
+            )
+            .scalar_subquery()
+        )
+
 
 class BinaryData(SchemaType):  # type: ignore[misc]
     """
@@ -131,13 +220,29 @@ class BinaryData(SchemaType):  # type: ignore[misc]
     The deserialize method gets a Python ``file`` object and returns a
     bytes string that is appropriate for the database.
 
+    A ``BinaryDataCopy`` (serialize) or an SQL expression (deserialize) is
+    kept as is, to copy the content in the database.
+
+    **Attributes/Arguments**
+
+    max_size
+        The maximum size of the files, in bytes, checked without reading them.
+
+    stream
+        Return the ``file`` object itself instead of its content, so it is
+        not read in memory. Used by ``c2cgeoform.models.FileData``, where the
+        content is written to the database by chunks on flush.
     """
 
+    def __init__(self, max_size: int | None = None, stream: bool = False) -> None:
+        self.max_size = max_size
+        self.stream = stream
+
     def serialize(
         self,
         node: colander.SchemaNode,
-        appstruct: colander._null | Buffer,
-    ) -> colander._null | io.BytesIO:
+        appstruct: colander._null | Buffer | BinaryDataCopy,
+    ) -> colander._null | io.BytesIO | BinaryDataCopy:
         """
         Serialize a file stream to plain binary.
 
@@ -148,13 +253,15 @@ class BinaryData(SchemaType):  # type: ignore[misc]
 
         if appstruct is colander.null or appstruct == "":
             return colander.null
+        if isinstance(appstruct, BinaryDataCopy):
+            return appstruct
         return BytesIO(appstruct)
 
     def deserialize(
         self,
         node: colander.SchemaNode,
-        cstruct: colander._null | str | io.IOBase,
-    ) -> colander._null | bytes:
+        cstruct: colander._null | str | io.IOBase | ClauseElement,
+    ) -> colander._null | bytes | io.IOBase | ClauseElement:
         """
         Serialize a file stream to plain binary.
 
@@ -162,11 +269,17 @@ class BinaryData(SchemaType):  # type: ignore[misc]
         Python data structure (a appstruct).
         Or: Converts a Python file stream to plain binary data.
         """
-        del node  # unused
-
+        if isinstance(cstruct, ClauseElement):
+            return cstruct
         if cstruct is colander.null or cstruct == "":
             return colander.null
         assert isinstance(cstruct, io.IOBase)
+        size = cstruct.seek(0, os.SEEK_END)
+        cstruct.seek(0, os.SEEK_SET)
+        if self.max_size is not None and size > self.max_size:
+            raise Invalid(node, file_too_large_message(self.max_size))
+        if self.stream:
+            return cstruct
         byte_array = cstruct.read()
         # set the file position back to 0, so that the file can be read again
         cstruct.seek(0, os.SEEK_SET)
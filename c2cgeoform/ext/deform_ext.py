@@ -1,8 +1,12 @@
 import json
 import logging
 import os
+import tempfile
+import uuid
+import weakref
 from collections.abc import Callable
-from io import BufferedRandom, BytesIO
+from io import BufferedRandom, BufferedReader, BytesIO
+from pathlib import Path
 from typing import Any
 
 import colander
@@ -22,10 +26,12 @@ from deform.widget import (
     Widget,
 )
 from deform.widget import FileUploadWidget as DeformFileUploadWidget
-from sqlalchemy import inspect
+from sqlalchemy import event, inspect, select
 from translationstring import TranslationString, TranslationStringFactory
 
-from c2cgeoform import JSON, JSONDict, default_map_settings
+from c2cgeoform import JSON, JSONDict, default_map_settings, thumbnails
+from c2cgeoform.cache import DirectoryCache, TTLCache
+from c2cgeoform.ext.colander_ext import BinaryDataCopy, file_too_large_message
 
 _ = TranslationStringFactory("c2cgeoform")
 log = logging.getLogger(__name__)
@@ -138,8 +144,24 @@ class MapWidget(Widget):  # type: ignore[misc]
         }
 
 
+# The relation widgets caching their values, see RelationSelectMixin
+_CACHED_RELATION_WIDGETS: "weakref.WeakSet[RelationSelectMixin]" = weakref.WeakSet()
+# Key of the models changed by a session, in its info, to invalidate the caches on commit
+_CHANGED_MODELS_KEY = "c2cgeoform_changed_models"
+
+
 class RelationSelectMixin:
-    """Mixin class to support relations for select fields."""
+    """
+    Mixin class to support relations for select fields.
+
+    Only the id and the label columns are queried. With ``cache_ttl`` (in seconds), the values are
+    cached for each database, and invalidated when the session flushes or commits changes to the
+    model. The changes made by other processes or by bulk statements are only seen after the TTL.
+    """
+
+    cache_ttl: float | None = None
+    cache_maxsize: int = 8
+    _values_cache: TTLCache | None = None
 
     def __init__(
         self,
@@ -160,18 +182,71 @@ class RelationSelectMixin:
         self.values = self._get_select_values(session)
 
     def _get_select_values(self, session: sqlalchemy.orm.Session) -> tuple[str | tuple[str, str], ...]:
+        if self.cache_ttl is None:
+            values = self._query_values(session)
+        else:
+            if self._values_cache is None:
+                self._values_cache = TTLCache(ttl=self.cache_ttl, maxsize=self.cache_maxsize)
+                _CACHED_RELATION_WIDGETS.add(self)
+            key = str(session.get_bind(inspect(self.model)).engine.url)
+            values = self._values_cache.get(key)
+            if values is None:
+                values = self._query_values(session)
+                self._values_cache.set(key, values)
+
+        if self.default_value is None:
+            return values
+        return (self.default_value, *values)
+
+    def _query_values(self, session: sqlalchemy.orm.Session) -> tuple[tuple[str, str], ...]:
         model = inspect(self.model)
         order_by = getattr(model.columns, self.order_by) if self.order_by is not None else None
+        id_ = getattr(self.model, self.id_field)
+        label = getattr(self.model, self.label_field)
 
+        if hasattr(id_, "__clause_element__") and hasattr(label, "__clause_element__"):
+            rows = session.execute(select(id_, label).order_by(order_by))
+            return tuple((row[0], row[1]) for row in rows)
+        # The label is computed in Python
         entities = session.query(model).order_by(order_by)
-
-        values: tuple[tuple[str, str], ...] = tuple(
+        return tuple(
             (getattr(entity, self.id_field), getattr(entity, self.label_field)) for entity in entities
         )
 
-        if self.default_value is None:
-            return values
-        return (self.default_value, *values)
+    def invalidate(self) -> None:
+        """Clear the cached values."""
+        if self._values_cache is not None:
+            self._values_cache.clear()
+
+
+def _invalidate_relation_widgets(models: set[type[Any]]) -> None:
+    for widget in list(_CACHED_RELATION_WIDGETS):
+        if any(issubclass(model, widget.model) for model in models):
+            widget.invalidate()
+
+
+@event.listens_for(sqlalchemy.orm.Session, "after_flush")
+def _invalidate_flushed_relations(session: sqlalchemy.orm.Session, flush_context: Any) -> None:
+    del flush_context  # unused
+    if not _CACHED_RELATION_WIDGETS:
+        return
+    models = {type(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    if models:
+        _invalidate_relation_widgets(models)
+        # Also on commit, the other sessions may have cached the previous values in the meantime
+        session.info.setdefault(_CHANGED_MODELS_KEY, set()).update(models)
+
+
+@event.listens_for(sqlalchemy.orm.Session, "after_commit")
+def _invalidate_committed_relations(session: sqlalchemy.orm.Session) -> None:
+    models = session.info.pop(_CHANGED_MODELS_KEY, None)
+    if models:
+        _invalidate_relation_widgets(models)
+
+
+@event.listens_for(sqlalchemy.orm.Session, "after_rollback")
+def _forget_changed_relations(session: sqlalchemy.orm.Session) -> None:
+    session.info.pop(_CHANGED_MODELS_KEY, None)
 
 
 class RelationMultiSelectMixin(RelationSelectMixin):
@@ -317,6 +392,16 @@ class RelationSelectWidget(SelectWidget, RelationMultiSelectMixin):  # type: ign
         Allow to select multiple values. Requires a n:m relationship.
         Default: ``False``.
 
+    cache_ttl
+        Cache the values during this number of seconds. The cache is
+        invalidated when the model is changed through an SQLAlchemy session,
+        the other changes are seen after the TTL.
+        Default: ``None`` (not cached).
+
+    cache_maxsize
+        The number of databases for which the values are cached.
+        Default: ``8``.
+
     For further attributes, please refer to the documentation of
     ``deform.widget.SelectWidget`` in the deform documentation:
     <http://deform.readthedocs.org/en/latest/api.html>
@@ -425,6 +510,16 @@ class RelationSelect2Widget(Select2Widget, RelationMultiSelectMixin):  # type: i
         Allow to select multiple values. Requires a n:m relationship.
         Default: ``False``.
 
+    cache_ttl
+        Cache the values during this number of seconds. The cache is
+        invalidated when the model is changed through an SQLAlchemy session,
+        the other changes are seen after the TTL.
+        Default: ``None`` (not cached).
+
+    cache_maxsize
+        The number of databases for which the values are cached.
+        Default: ``8``.
+
     For further attributes, please refer to the documentation of
     ``deform.widget.Select2Widget`` in the deform documentation:
     <http://deform.readthedocs.org/en/latest/api.html>
@@ -510,6 +605,16 @@ class RelationCheckBoxListWidget(CheckboxChoiceWidget, RelationMultiSelectMixin)
         a function taking request and value as parameter and returning
         an url to the corresponding resource.
 
+    cache_ttl
+        Cache the values during this number of seconds. The cache is
+        invalidated when the model is changed through an SQLAlchemy session,
+        the other changes are seen after the TTL.
+        Default: ``None`` (not cached).
+
+    cache_maxsize
+        The number of databases for which the values are cached.
+        Default: ``8``.
+
     For further attributes, please refer to the documentation of
     ``deform.widget.Select2Widget`` in the deform documentation:
     <http://deform.readthedocs.org/en/latest/api.html>
@@ -577,6 +682,16 @@ class RelationRadioChoiceWidget(RadioChoiceWidget, RelationSelectMixin):  # type
         the SQL query.
         Default: ``None``.
 
+    cache_ttl
+        Cache the values during this number of seconds. The cache is
+        invalidated when the model is changed through an SQLAlchemy session,
+        the other changes are seen after the TTL.
+        Default: ``None`` (not cached).
+
+    cache_maxsize
+        The number of databases for which the values are cached.
+        Default: ``8``.
+
     For further attributes, please refer to the documentation of
     ``deform.widget.RadioChoiceWidget`` in the deform documentation:
     <http://deform.readthedocs.org/en/latest/api.html>
@@ -634,6 +749,111 @@ class FileUploadTempStore:
         pass
 
 
+# Key of the handles of the spooled files in the session
+_SPOOL_KEY = "c2cgeoform_spool"
+
+
+class FileUploadSpoolStore(FileUploadTempStore):
+    """
+    Upload temporary store keeping the content of the files in a spool directory.
+
+    Only a handle (the name of the spool file) is stored in the session, the content is copied to
+    ``directory`` without being read in memory, with unique names. The files are kept in a
+    ``c2cgeoform.cache.DirectoryCache`` (``spool``), so removed after ``ttl`` seconds without access.
+    The files opened by the store are closed by ``close``, at the end of the request with
+    ``get_upload_temp_store``.
+
+    Selected with the settings:
+
+    .. code-block:: ini
+
+        c2cgeoform.upload_temp_store = spool
+        c2cgeoform.upload_temp_store.directory = /var/spool/c2cgeoform
+        c2cgeoform.upload_temp_store.ttl = 3600
+    """
+
+    def __init__(
+        self,
+        session: pyramid.interfaces.ISession,
+        directory: str | Path,
+        ttl: float = 3600,
+    ) -> None:
+        super().__init__(session)
+        self.spool = DirectoryCache(directory, ttl)
+        self._files: list[BufferedReader] = []
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return super().get(name, default)
+        except FileNotFoundError:
+            log.warning("The uploaded file %s has expired", name)
+            return default
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return super().__getitem__(name)
+        except FileNotFoundError as error:
+            raise KeyError(name) from error
+
+    def serialize(self, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {k: self.serialize(v) for k, v in data.items()}
+        if isinstance(data, BufferedRandom | BufferedReader | BytesIO):
+            return {_SPOOL_KEY: self._spool(data)}
+        return data
+
+    def deserialize(self, data: Any) -> Any:
+        if isinstance(data, dict):
+            if _SPOOL_KEY in data:
+                return self._open(data[_SPOOL_KEY])
+            return {k: self.deserialize(v) for k, v in data.items()}
+        return data
+
+    def _spool(self, data: Any) -> str:
+        name = uuid.uuid4().hex
+        self.spool.write(name, data)
+        # set the file position back to 0, so that the file can be read again
+        data.seek(0, os.SEEK_SET)
+        return name
+
+    def _open(self, name: str) -> BufferedReader:
+        file_ = self.spool.open(name)
+        self._files.append(file_)
+        return file_
+
+    def close(self) -> None:
+        """Close the files opened by the store."""
+        for file_ in self._files:
+            file_.close()
+        self._files.clear()
+
+
+def get_upload_temp_store(request: pyramid.request.Request) -> FileUploadTempStore:
+    """
+    Get the upload temporary store selected by the ``c2cgeoform.upload_temp_store`` setting.
+
+    ``session`` (the default) keeps the content of the files in the session, ``spool`` in a directory,
+    see ``FileUploadSpoolStore``.
+    """
+    settings = request.registry.settings or {}
+    name = settings.get("c2cgeoform.upload_temp_store", "session")
+    if name == "spool":
+        store = FileUploadSpoolStore(
+            request.session,
+            settings.get(
+                "c2cgeoform.upload_temp_store.directory",
+                Path(tempfile.gettempdir()) / "c2cgeoform_uploads",
+            ),
+            float(settings.get("c2cgeoform.upload_temp_store.ttl", 3600)),
+        )
+        request.add_finished_callback(lambda request: store.close())
+        return store
+    if name != "session":
+        message = f"Unknown upload temporary store: {name}"
+        raise ValueError(message)
+    return FileUploadTempStore(request.session)
+
+
 class FileUploadWidget(DeformFileUploadWidget):  # type: ignore[misc]
     """
     File upload Deform widget.
@@ -649,6 +869,9 @@ class FileUploadWidget(DeformFileUploadWidget):  # type: ignore[misc]
     Note also that it is required to set ``unknown`` to ``'preserve'`` in the
     ``__colanderalchemy_config__`` dictionary.
 
+    The content of the stored files (``FileData.data``) is not loaded to render
+    the form, and it is kept when no new file is uploaded.
+
     Example usage
 
     .. code-block:: python
@@ -677,45 +900,115 @@ class FileUploadWidget(DeformFileUploadWidget):  # type: ignore[misc]
         .. code-block:: python
 
             'widget': deform_ext.FileUploadWidget(
-                _file_upload_temp_store,
                 id_field="id",
                 get_url=lambda request, id: request.route_url('file', id=id)
             )
+
+    get_thumbnail_url (optional)
+        A callback function `function(request, id) -> string` which returns
+        the URL of a thumbnail of the image files, shown in the form when Pillow
+        is installed, e.g. with
+        ``c2cgeoform.views.file_views.FileDataViews.thumbnail``:
+
+        .. code-block:: python
+
+            'widget': deform_ext.FileUploadWidget(
+                get_thumbnail_url=lambda request, id: request.route_url(
+                    'c2cgeoform_thumbnail', table='photos', id=id
+                )
+            )
+
+    max_size (optional)
+        The maximum size of the uploaded files, in bytes, checked before they
+        are copied in the temporary store. Default to the
+        ``c2cgeoform.upload_max_size`` setting, no limit if it is not set.
     """
 
     id_field = "id"
+    max_size: int | None = None
     request: pyramid.request.Request | None = None
     tmpstore: FileUploadTempStore | None = None
 
     def __init__(
         self,
         get_url: Callable[[pyramid.request.Request, JSON], str] | None = None,
+        get_thumbnail_url: Callable[[pyramid.request.Request, JSON], str] | None = None,
         **kw: Any,
     ) -> None:
         DeformFileUploadWidget.__init__(self, None, **kw)
         self.get_url = get_url
+        self.get_thumbnail_url = get_thumbnail_url
 
     def populate(self, session: sqlalchemy.orm.Session, request: pyramid.request.Request) -> None:
         del session  # unused
         self.request = request
-        self.tmpstore = FileUploadTempStore(request.session)
+        self.tmpstore = get_upload_temp_store(request)
 
     def serialize(self, field: deform.field.Field, cstruct: JSONDict, **kw: Any) -> str:
         if cstruct in (colander.null, None):
             cstruct = {}
         kw["url"] = None
+        kw["thumbnail_url"] = None
+        if "uid" not in cstruct and cstruct.get(self.id_field) in (colander.null, None):
+            self._store_copy(cstruct)
         if "uid" not in cstruct and self.id_field in cstruct:
             cstruct["uid"] = cstruct[self.id_field]
             if cstruct[self.id_field] != colander.null and self.get_url:
                 kw["url"] = self.get_url(self.request, cstruct[self.id_field])
+            if (
+                cstruct[self.id_field] != colander.null
+                and self.get_thumbnail_url
+                # The thumbnail view requires Pillow
+                and thumbnails.Image is not None
+                and str(cstruct.get("mimetype") or "").startswith("image/")
+            ):
+                kw["thumbnail_url"] = self.get_thumbnail_url(self.request, cstruct[self.id_field])
         if cstruct.get("filename") == colander.null:
             cstruct["filename"] = ""
         return DeformFileUploadWidget.serialize(self, field, cstruct, **kw)  # type: ignore[no-any-return]
 
+    def _store_copy(self, cstruct: JSONDict) -> None:
+        """
+        Store the file of a duplicated record in the temporary store, to be saved with the form.
+
+        Only the source of the content is stored (or the hash with ``ContentAddressedFileData``), the
+        content is copied in the database.
+        """
+        copy = cstruct.get("data")
+        if self.tmpstore is None or not (isinstance(copy, BinaryDataCopy) or cstruct.get("sha256")):
+            return
+        uid = self.random_id()
+        value = {key: value for key, value in cstruct.items() if key != "data" and value is not colander.null}
+        if isinstance(copy, BinaryDataCopy):
+            value["copy_of"] = list(copy.identity)
+        value["uid"] = uid
+        value["preview_url"] = self.tmpstore.preview_url(uid)
+        self.tmpstore[uid] = value
+        cstruct["uid"] = uid
+
+    def _check_size(self, field: deform.field.Field, pstruct: Any) -> None:
+        max_size = self.max_size
+        if max_size is None and self.request is not None:
+            max_size = (self.request.registry.settings or {}).get("c2cgeoform.upload_max_size")
+        upload = pstruct.get("upload") if isinstance(pstruct, dict) else None
+        if max_size is None or not hasattr(upload, "file"):
+            return
+        # The uploads are already in temporary files, get the size without reading them
+        size = upload.file.seek(0, os.SEEK_END)
+        upload.file.seek(0, os.SEEK_SET)
+        if size > int(max_size):
+            raise Invalid(field.schema, file_too_large_message(max_size))
+
     def deserialize(self, field: deform.field.Field, pstruct: str) -> Any:
+        self._check_size(field, pstruct)
         value = DeformFileUploadWidget.deserialize(self, field, pstruct)
+        if value != colander.null and "copy_of" in value:
+            value["data"] = BinaryDataCopy(value.pop("copy_of")).expression(field.schema.class_, "data")
         if value != colander.null and "fp" in value:
             value["data"] = value.pop("fp")
+            # The size given by the upload may be unknown
+            value["size"] = value["data"].seek(0, os.SEEK_END)
+            value["data"].seek(0, os.SEEK_SET)
         return value
 
 
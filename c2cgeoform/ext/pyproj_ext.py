@@ -0,0 +1,37 @@
+import threading
+
+import numpy as np
+import pyproj
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+_LOCAL = threading.local()
+
+
+def get_transformer(source_srid: int, target_srid: int) -> pyproj.Transformer:
+    """
+    Get a transformer between two EPSG projections, with the x/y (longitude/latitude) axis order.
+
+    The transformers are slow to build, so they are cached. A ``pyproj.Transformer`` and its PROJ
+    context must not be used by several threads at once, so the cache is per thread rather than
+    process-wide (that would require a lock around each transformation): each thread of a WSGI
+    server builds a transformer once by pair of projections.
+    """
+    transformers: dict[tuple[int, int], pyproj.Transformer] | None = getattr(_LOCAL, "transformers", None)
+    if transformers is None:
+        transformers = _LOCAL.transformers = {}
+    transformer = transformers.get((source_srid, target_srid))
+    if transformer is None:
+        transformer = pyproj.Transformer.from_crs(source_srid, target_srid, always_xy=True)
+        transformers[(source_srid, target_srid)] = transformer
+    return transformer
+
+
+def transform_geometry(geometry: BaseGeometry, source_srid: int, target_srid: int) -> BaseGeometry:
+    """Reproject ``geometry``, with all its coordinates transformed at once."""
+    transformer = get_transformer(source_srid, target_srid)
+
+    def transform_coordinates(coordinates: np.ndarray) -> np.ndarray:
+        return np.column_stack(transformer.transform(*coordinates.T))
+
+    return shapely.transform(geometry, transform_coordinates, include_z=geometry.has_z)  # type: ignore[no-any-return]
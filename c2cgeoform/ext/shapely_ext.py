@@ -0,0 +1,70 @@
+import json
+from typing import Any
+
+import shapely
+from geojson.utils import map_tuples
+from shapely.errors import GEOSException
+from shapely.geometry import mapping, shape
+from shapely.geometry.base import BaseGeometry
+
+from c2cgeoform import JSONDict
+
+# GeoJSON reader and writer of GEOS
+_NATIVE_GEOJSON = shapely.geos_version >= (3, 10, 0)
+
+
+def to_geojson(geometry: BaseGeometry) -> str:
+    """Encode ``geometry`` in GeoJSON, natively with GEOS when possible."""
+    if _NATIVE_GEOJSON:
+        try:
+            return shapely.to_geojson(geometry)  # type: ignore[no-any-return]
+        except (GEOSException, NotImplementedError):
+            pass
+    return json.dumps(mapping(geometry))
+
+
+def from_geojson(text: str) -> BaseGeometry:
+    """Decode a GeoJSON geometry, natively with GEOS when possible."""
+    if _NATIVE_GEOJSON:
+        try:
+            return shapely.from_geojson(text)  # type: ignore[no-any-return]
+        except (GEOSException, NotImplementedError):
+            pass
+    return shape(json.loads(text))
+
+
+def round_coordinates(geometry: BaseGeometry, digits: int) -> BaseGeometry:
+    """Round the coordinates of ``geometry`` to ``digits`` decimal digits, keeping the Z."""
+    return shapely.transform(  # type: ignore[no-any-return]
+        geometry, lambda coordinates: coordinates.round(digits), include_z=geometry.has_z
+    )
+
+
+def quantize(
+    geometries: list[BaseGeometry | None],
+    quantization: int,
+) -> tuple[JSONDict, list[dict[str, Any] | None]]:
+    """
+    Encode the coordinates of ``geometries`` as integers, like TopoJSON.
+
+    The bounds of the geometries are divided in ``quantization`` values in each dimension, the
+    coordinates are decoded with ``x * scale[0] + translate[0]`` (and the same for ``y``).
+
+    Returns the ``transform`` (with the ``scale`` and the ``translate``) and the GeoJSON mappings of
+    the quantized geometries.
+    """
+    valid = [geometry for geometry in geometries if geometry is not None and not geometry.is_empty]
+    minx, miny, maxx, maxy = (
+        (float(value) for value in shapely.total_bounds(valid)) if valid else (0, 0, 0, 0)
+    )
+    scale_x = (maxx - minx) / (quantization - 1) or 1.0
+    scale_y = (maxy - miny) / (quantization - 1) or 1.0
+
+    def quantize_position(position: tuple[float, ...]) -> tuple[int, int]:
+        return round((position[0] - minx) / scale_x), round((position[1] - miny) / scale_y)
+
+    transform: JSONDict = {"scale": [scale_x, scale_y], "translate": [minx, miny]}
+    return transform, [
+        None if geometry is None else map_tuples(quantize_position, mapping(geometry))
+        for geometry in geometries
+    ]
@@ -1,6 +1,28 @@
-from sqlalchemy import Column, Integer, LargeBinary, Text
+import hashlib
+import os
+from typing import Any, ClassVar
+
+import colander
+import sqlalchemy.engine
+import sqlalchemy.orm
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    event,
+    exists,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import Mapped, column_property, declared_attr, mapped_column, scoped_session, sessionmaker
+from sqlalchemy.sql import ClauseElement
 from zope.sqlalchemy import register
 
 from .ext import colander_ext
@@ -13,4 +35,221 @@ Base = declarative_base()
 class FileData:
     id = Column(Integer, primary_key=True)
     filename = Column(Text, nullable=True)
-    data = Column(LargeBinary, nullable=False, info={"colanderalchemy": {"typ": colander_ext.BinaryData()}})
+    mimetype = Column(Text, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    # Hash of the content, set on write, used as ETag by the FileDataViews
+    sha256 = Column(String(64), nullable=True, info={"colanderalchemy": {"exclude": True}})
+    # Deferred, the forms only use the other columns, and the stored data is kept when no file is uploaded
+    data = mapped_column(
+        LargeBinary,
+        nullable=False,
+        deferred=True,
+        info={"colanderalchemy": {"typ": colander_ext.BinaryData(stream=True), "missing": colander.drop}},
+    )
+
+
+class FileBlob:
+    """
+    Mixin of the table storing the content of the ``ContentAddressedFileData`` files.
+
+    Each content is stored once, keyed by its SHA-256 hash.
+    """
+
+    sha256 = Column(String(64), primary_key=True)
+    data = mapped_column(LargeBinary, nullable=False, deferred=True)
+
+
+class ContentAddressedFileData(FileData):
+    """
+    Like ``FileData``, but the content is stored once in a ``FileBlob`` table, given by ``__file_blob__``.
+
+    The rows reference the content by its hash (``sha256``), so storing or copying a file already stored
+    only costs a reference. ``data`` reads the content from the blob table, setting it stores the
+    content if needed and updates the reference on flush.
+
+    Example usage
+
+    .. code-block:: python
+
+        class Blob(FileBlob, Base):
+            __tablename__ = 'blob'
+
+        class Photo(ContentAddressedFileData, Base):
+            __tablename__ = 'photo'
+            __file_blob__ = Blob
+
+    The blobs that are no more referenced can be removed with ``delete_orphan_file_blobs``.
+    """
+
+    __file_blob__: ClassVar[type[FileBlob]]
+
+    @declared_attr
+    def sha256(cls) -> Mapped[str]:  # noqa: N805
+        return mapped_column(
+            String(64),
+            ForeignKey(cls.__file_blob__.sha256),
+            nullable=False,
+            index=True,
+            # Not rendered by the FileUploadWidget, used to copy the references of the duplicated records
+            info={"colanderalchemy": {"missing": colander.drop}},
+        )
+
+    @declared_attr
+    def data(cls) -> Mapped[bytes]:  # noqa: N805
+        blob = cls.__file_blob__
+        return column_property(
+            select(blob.data).where(blob.sha256 == cls.sha256).scalar_subquery(),
+            deferred=True,
+        )
+
+
+# Size of the chunks of the files written to the database
+_CHUNK_SIZE = 1024 * 1024
+# Key of the large object holding the content being written, in the info of the instance state
+_LARGE_OBJECT_KEY = "c2cgeoform_large_object"
+
+
+def _is_file(data: Any) -> bool:
+    return hasattr(data, "read")
+
+
+def _read(data: Any) -> bytes:
+    if hasattr(data, "read"):
+        data.seek(0, os.SEEK_SET)
+        value = data.read()
+        data.seek(0, os.SEEK_SET)
+        return value  # type: ignore[no-any-return]
+    return bytes(data)
+
+
+def _sha256(data: Any) -> str:
+    if not _is_file(data):
+        return hashlib.sha256(data).hexdigest()
+    data.seek(0, os.SEEK_SET)
+    digest = hashlib.file_digest(data, "sha256").hexdigest()
+    data.seek(0, os.SEEK_SET)
+    return digest
+
+
+def _oid(oid: int) -> Any:
+    # The OIDs are unsigned, they may not fit in an integer
+    return literal(oid, postgresql.OID)
+
+
+def _write_large_object(connection: sqlalchemy.engine.Connection, file_: Any) -> int:
+    """
+    Write the content of ``file_`` by chunks in a new PostgreSQL large object, and get its OID.
+
+    The content is then read in the database with ``lo_get``, so it is never entirely in memory in
+    Python. The large object should be removed with ``lo_unlink``, it is also removed on rollback.
+    """
+    file_.seek(0, os.SEEK_SET)
+    oid: int = connection.execute(select(func.lo_from_bytea(0, b""))).scalar_one()
+    offset = 0
+    while chunk := file_.read(_CHUNK_SIZE):
+        connection.execute(select(func.lo_put(_oid(oid), literal(offset, BigInteger), chunk)))
+        offset += len(chunk)
+    file_.seek(0, os.SEEK_SET)
+    return oid
+
+
+def _insert_blob(connection: sqlalchemy.engine.Connection, blob: type[FileBlob], data: Any) -> str:
+    """Store ``data`` (bytes or a file) in the ``blob`` table if it is not already there, and get its hash."""
+    sha256 = _sha256(data)
+    table = sqlalchemy.inspect(blob).local_table
+    oid = None
+    if _is_file(data):
+        # Only write the content when it is not already stored
+        if connection.execute(select(exists().where(table.c.sha256 == sha256))).scalar():
+            return sha256
+        if connection.dialect.name == "postgresql":
+            oid = _write_large_object(connection, data)
+            data = func.lo_get(_oid(oid))
+        else:
+            data = _read(data)
+    values = {"sha256": sha256, "data": data}
+    # Insert concurrently the same content in several transactions without errors
+    if connection.dialect.name == "postgresql":
+        connection.execute(postgresql.insert(table).values(values).on_conflict_do_nothing())
+    elif connection.dialect.name == "sqlite":
+        connection.execute(sqlite.insert(table).values(values).on_conflict_do_nothing())
+    elif not connection.execute(select(exists().where(table.c.sha256 == sha256))).scalar():
+        connection.execute(table.insert().values(values))
+    if oid is not None:
+        connection.execute(select(func.lo_unlink(_oid(oid))))
+    return sha256
+
+
+@event.listens_for(FileData, "before_insert", propagate=True)
+@event.listens_for(FileData, "before_update", propagate=True)
+def _write_file(
+    mapper: sqlalchemy.orm.Mapper[Any],
+    connection: sqlalchemy.engine.Connection,
+    target: FileData,
+) -> None:
+    """
+    Write the content given as a file (see ``BinaryData.stream``) by chunks on PostgreSQL, set its hash.
+
+    The content copied in the database (see ``BinaryDataCopy``) is hashed by PostgreSQL, on the other
+    databases the hash copied with the other columns is kept.
+    """
+    del mapper  # unused
+    if isinstance(target, ContentAddressedFileData):
+        return  # See _store_blob
+    history = sqlalchemy.inspect(target).attrs.data.history
+    if not history.added or history.added[0] is None:
+        return
+    data = history.added[0]
+    if isinstance(data, ClauseElement):
+        if connection.dialect.name == "postgresql":
+            target.sha256 = func.encode(func.sha256(data), "hex")
+        return
+    target.sha256 = _sha256(data)
+    if not _is_file(data):
+        return
+    if connection.dialect.name == "postgresql":
+        oid = _write_large_object(connection, history.added[0])
+        sqlalchemy.inspect(target).info[_LARGE_OBJECT_KEY] = oid
+        target.data = func.lo_get(_oid(oid))
+    else:
+        target.data = _read(history.added[0])
+
+
+@event.listens_for(FileData, "after_insert", propagate=True)
+@event.listens_for(FileData, "after_update", propagate=True)
+def _unlink_large_object(
+    mapper: sqlalchemy.orm.Mapper[Any],
+    connection: sqlalchemy.engine.Connection,
+    target: FileData,
+) -> None:
+    del mapper  # unused
+    oid = sqlalchemy.inspect(target).info.pop(_LARGE_OBJECT_KEY, None)
+    if oid is not None:
+        connection.execute(select(func.lo_unlink(_oid(oid))))
+
+
+@event.listens_for(ContentAddressedFileData, "before_insert", propagate=True)
+@event.listens_for(ContentAddressedFileData, "before_update", propagate=True)
+def _store_blob(
+    mapper: sqlalchemy.orm.Mapper[Any],
+    connection: sqlalchemy.engine.Connection,
+    target: ContentAddressedFileData,
+) -> None:
+    del mapper  # unused
+    history = sqlalchemy.inspect(target).attrs.data.history
+    if history.added and history.added[0] is not None:
+        data = history.added[0]
+        target.sha256 = _insert_blob(
+            connection, target.__file_blob__, data if _is_file(data) else bytes(data)
+        )
+
+
+def delete_orphan_file_blobs(
+    session: sqlalchemy.orm.Session,
+    blob: type[FileBlob],
+    *models: type[ContentAddressedFileData],
+) -> int:
+    """Delete the content of the ``blob`` table that is not referenced by the ``models``, get the count."""
+    table = sqlalchemy.inspect(blob).local_table
+    condition = [~exists().where(model.sha256 == table.c.sha256) for model in models]
+    return session.execute(table.delete().where(*condition)).rowcount  # type: ignore[attr-defined,no-any-return]
@@ -0,0 +1,126 @@
+import datetime as dt
+import decimal
+import logging
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import pyramid.config
+import pyramid.request
+from pyramid.interfaces import IRendererFactory
+from pyramid.renderers import JSON
+from shapely.geometry import mapping
+from shapely.geometry.base import BaseGeometry
+
+_LOGGER = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def _isoformat(value: dt.date | dt.time, request: pyramid.request.Request) -> str:
+    del request  # unused
+    return value.isoformat()
+
+
+def _float(value: decimal.Decimal, request: pyramid.request.Request) -> float:
+    del request  # unused
+    return float(value)
+
+
+def _mapping(value: BaseGeometry, request: pyramid.request.Request) -> dict[str, Any]:
+    del request  # unused
+    return mapping(value)  # type: ignore[no-any-return]
+
+
+def stdlib_json_renderer() -> JSON:
+    """Get the Pyramid JSON renderer, with adapters for the dates, the decimals and the geometries."""
+    renderer = JSON()
+    renderer.add_adapter(dt.date, _isoformat)  # Also dt.datetime
+    renderer.add_adapter(dt.time, _isoformat)
+    renderer.add_adapter(decimal.Decimal, _float)
+    renderer.add_adapter(BaseGeometry, _mapping)
+    return renderer
+
+
+def _default(request: pyramid.request.Request | None, value: Any) -> Any:
+    """Convert the values not serialized by orjson."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, BaseGeometry):
+        return mapping(value)
+    if hasattr(value, "__json__"):
+        return value.__json__(request)
+    if hasattr(value, "__geo_interface__"):
+        return value.__geo_interface__
+    message = f"{value!r} is not JSON serializable"
+    raise TypeError(message)
+
+
+class OrjsonRenderer:
+    """
+    A JSON renderer using orjson.
+
+    The dates and the subclasses of ``dict`` and ``str``, like ``geojson.Feature`` and
+    ``TranslationString``, are serialized natively, the decimals as floats and the geometries as
+    GeoJSON. As with the standard library, the translation strings are not translated.
+    """
+
+    def __call__(self, info: Any) -> Callable[[Any, dict[str, Any]], bytes]:
+        del info  # unused
+        return self._render
+
+    def _render(self, value: Any, system: dict[str, Any]) -> bytes:
+        request = system.get("request")
+        if request is not None:
+            response = request.response
+            if response.content_type == response.default_content_type:
+                response.content_type = "application/json"
+        return orjson.dumps(  # type: ignore[no-any-return]
+            value,
+            default=partial(_default, request),
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def json_renderer(name: str = "json") -> Any:
+    """
+    Get the JSON renderer factory named ``name``: ``json`` (the standard library) or ``orjson``.
+
+    Fall back to the standard library when orjson is not installed.
+    """
+    if name == "orjson":
+        if orjson is not None:
+            return OrjsonRenderer()
+        _LOGGER.warning("orjson is not installed, using the standard json library")
+    elif name != "json":
+        message = f"Unknown JSON renderer: {name}"
+        raise ValueError(message)
+    return stdlib_json_renderer()
+
+
+def json_serializer(request: pyramid.request.Request) -> Callable[[Any], str]:
+    """
+    Get a function serializing values like the ``c2cgeoform_json`` renderer, to build parts of responses.
+
+    Fall back to the standard library renderer when the ``c2cgeoform_json`` renderer is not registered.
+    """
+    factory = request.registry.queryUtility(IRendererFactory, name="c2cgeoform_json")
+    render = (factory or stdlib_json_renderer())(None)
+    system = {"request": None}  # Leave the response content type alone
+
+    def serialize(value: Any) -> str:
+        result = render(value, system)
+        return result.decode() if isinstance(result, bytes) else result  # type: ignore[no-any-return]
+
+    return serialize
+
+
+def includeme(config: pyramid.config.Configurator) -> None:
+    """Register the ``c2cgeoform_json`` renderer, selected by the ``c2cgeoform.json_renderer`` setting."""
+    config.add_renderer(
+        "c2cgeoform_json",
+        json_renderer(config.get_settings().get("c2cgeoform.json_renderer", "json")),
+    )
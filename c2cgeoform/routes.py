@@ -143,8 +143,11 @@ def register_routes(config: pyramid.config.Configurator, multi_application: bool
     register_route(config, "c2cgeoform_grid", f"{base_route}/grid.json")
     register_route(config, "c2cgeoform_map", f"{base_route}/map")
     register_route(config, "c2cgeoform_geojson", f"{base_route}/geojson.json")
+    register_route(config, "c2cgeoform_tiles", f"{base_route}/tiles/{{z}}/{{x}}/{{y}}.mvt")
     register_route(config, "c2cgeoform_item", f"{base_route}/{{id}}")
     register_route(config, "c2cgeoform_item_duplicate", f"{base_route}/{{id}}/duplicate")
+    register_route(config, "c2cgeoform_file", f"{base_route}/{{id}}/file")
+    register_route(config, "c2cgeoform_thumbnail", f"{base_route}/{{id}}/thumbnail")
 
 
 def register_models(
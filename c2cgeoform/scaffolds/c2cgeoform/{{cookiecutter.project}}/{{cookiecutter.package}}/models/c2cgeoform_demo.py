@@ -18,15 +18,6 @@ schema = 'c2cgeoform_demo'
 EXCAV_ID = 'c2cgeoform_demo.excavation.id'
 
 
-# FIXME a file upload memory store is not appropriate for production
-# See http://docs.pylonsproject.org/projects/deform/en/latest/interfaces.html#deform.interfaces.FileUploadTempStore  # noqa
-class FileUploadTempStore(dict):
-    def preview_url(self, name):
-        return None
-
-_file_upload_temp_store = FileUploadTempStore()
-
-
 class District(Base):
     __tablename__ = 'district'
     __table_args__ = (
@@ -86,7 +77,12 @@ class Photo(FileData, Base):
         'title': _('Photo'),
         'unknown': 'preserve',
         'missing': colander.required,
-        'widget': deform_ext.FileUploadWidget(_file_upload_temp_store)
+        'widget': deform_ext.FileUploadWidget(
+            get_url=lambda request, id: request.route_url('c2cgeoform_file', table='photos', id=id),
+            get_thumbnail_url=lambda request, id: request.route_url(
+                'c2cgeoform_thumbnail', table='photos', id=id
+            ),
+        )
     }
     permission_id = Column(Integer, ForeignKey(EXCAV_ID))
 
@@ -3,7 +3,6 @@ from typing import TypeVar
 
 import colander
 from pyramid.view import view_config, view_defaults
-from sqlalchemy.orm import subqueryload
 
 from c2cgeoform.ext.deform_ext import RelationCheckBoxListWidget
 from c2cgeoform.schema import GeoFormManyToManySchemaNode, GeoFormSchemaNode, manytomany_validator
@@ -48,25 +47,20 @@ class ExcavationViews(AbstractViews[T]):
             "situations",
             renderer=lambda excavation: ", ".join([s.name for s in excavation.situations]),
             filter_column=Situation.name,
+            depends_on=["situations"],
         ),
     ]
 
     MSG_COL = {**AbstractViews.MSG_COL, "error": UserMessage(_("This is an error"), "alert-danger")}
 
     def _base_query(self):
-        return (
-            super()
-            ._base_query()
-            .distinct()
-            .outerjoin(Excavation.situations)
-            .options(subqueryload(Excavation.situations))
-        )
+        return super()._base_query().distinct().outerjoin(Excavation.situations)
 
     @view_config(route_name="c2cgeoform_index", renderer="../templates/index.jinja2")
     def index(self):
         return super().index()
 
-    @view_config(route_name="c2cgeoform_grid", renderer="json")
+    @view_config(route_name="c2cgeoform_grid", renderer="c2cgeoform_json")
     def grid(self):
         return super().grid()
 
@@ -102,10 +96,14 @@ class ExcavationViews(AbstractViews[T]):
     def map(self):
         return super().map({})
 
-    @view_config(route_name="c2cgeoform_geojson", renderer="json")
+    @view_config(route_name="c2cgeoform_geojson", renderer="c2cgeoform_json")
     def geojson(self):
         return super().geojson()
 
+    @view_config(route_name="c2cgeoform_tiles")
+    def tiles(self):
+        return super().tiles()
+
     @view_config(route_name="c2cgeoform_item", request_method="GET", renderer="../templates/edit.jinja2")
     def edit(self):
         return super().edit()
@@ -116,7 +114,7 @@ class ExcavationViews(AbstractViews[T]):
     def duplicate(self):
         return super().duplicate()
 
-    @view_config(route_name="c2cgeoform_item", request_method="DELETE", renderer="json")
+    @view_config(route_name="c2cgeoform_item", request_method="DELETE", renderer="c2cgeoform_json")
     def delete(self):
         return super().delete()
 
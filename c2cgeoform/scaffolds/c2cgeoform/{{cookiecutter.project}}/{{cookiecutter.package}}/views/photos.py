@@ -0,0 +1,18 @@
+from pyramid.view import view_config, view_defaults
+
+from c2cgeoform.views.file_views import FileDataViews
+
+from ..models.c2cgeoform_demo import Photo
+
+
+@view_defaults(match_param="table=photos")
+class PhotoViews(FileDataViews):
+    _model = Photo
+
+    @view_config(route_name="c2cgeoform_file", request_method="GET")
+    def download(self):
+        return super().download()
+
+    @view_config(route_name="c2cgeoform_thumbnail", request_method="GET")
+    def thumbnail(self):
+        return super().thumbnail()
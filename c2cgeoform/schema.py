@@ -6,10 +6,11 @@ import pyramid.request
 import sqlalchemy.orm
 import sqlalchemy.sql.elements
 from colanderalchemy import SQLAlchemySchemaNode
-from sqlalchemy import and_, or_
+from sqlalchemy import LargeBinary, and_, or_
 from sqlalchemy.inspection import inspect
 
 from c2cgeoform import JSONDict, _
+from c2cgeoform.ext.colander_ext import BinaryDataCopy
 
 
 @colander.deferred  # type: ignore[untyped-decorator]
@@ -41,6 +42,33 @@ def unique_validator(
         raise colander.Invalid(node, _("{} is already used.").format(value))
 
 
+class _DictifyProxy:
+    """
+    Proxy of an entity for ``dictify``, with ``colander.null`` for the binary columns that are not loaded.
+
+    The binary columns of the copies that are copied in the database are given as ``BinaryDataCopy``.
+    The related entities are also proxied.
+    """
+
+    def __init__(self, obj: Any) -> None:
+        self._obj = obj
+
+    def __getattr__(self, name: str) -> Any:
+        state = inspect(self._obj)
+        mapper = state.mapper
+        if name in mapper.column_attrs and isinstance(mapper.column_attrs[name].columns[0].type, LargeBinary):
+            if isinstance(state.dict.get(name), sqlalchemy.sql.elements.ClauseElement):
+                return BinaryDataCopy.source_of(self._obj) or colander.null
+            if name in state.unloaded:
+                return colander.null
+        value = getattr(self._obj, name)
+        if name in mapper.relationships and value is not None:
+            if mapper.relationships[name].uselist:
+                return [_DictifyProxy(item) for item in value]
+            return _DictifyProxy(value)
+        return value
+
+
 class GeoFormSchemaNode(SQLAlchemySchemaNode):  # type: ignore[misc] # pylint: disable=abstract-method
     """
     Node of a schema that is bound to a SQLAlchemy model.
@@ -69,6 +97,10 @@ class GeoFormSchemaNode(SQLAlchemySchemaNode):  # type: ignore[misc] # pylint: d
         self.request = deferred_request
         self.dbsession = deferred_dbsession
 
+    def dictify(self, obj: Any) -> JSONDict:
+        """Get the appstruct of ``obj``, without loading its deferred binary columns (e.g. ``FileData.data``)."""
+        return super().dictify(_DictifyProxy(obj))  # type: ignore[no-any-return]
+
     def add_unique_validator(
         self,
         column: sqlalchemy.orm.attributes.InstrumentedAttribute[Any],
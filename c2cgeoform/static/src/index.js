@@ -2,23 +2,85 @@ import Feature from 'ol/Feature'
 import GeoJSONFormat from 'ol/format/GeoJSON'
 import Map from 'ol/Map'
 import VectorSource from 'ol/source/Vector'
+import { bbox as bboxStrategy } from 'ol/loadingstrategy'
 import View from 'ol/View'
 import { defaults } from 'ol/interaction'
 import proj4 from 'proj4'
 import { register } from 'ol/proj/proj4'
 import { addControls, addGeolocation } from './controls'
 import { addInteractions } from './interactions'
-import { createLayer, createVectorLayer } from './layers.js'
+import { createLayer, createVectorLayer, createVectorTileLayer } from './layers.js'
 import { getStyleFunction } from './styles'
 import { defaults as controlDefaults } from 'ol/control'
 
-const format = new GeoJSONFormat()
+// Decode the coordinates quantized by the geojson view
+function dequantize(object) {
+  const [scaleX, scaleY] = object.transform.scale
+  const [translateX, translateY] = object.transform.translate
+  const decode = (coordinates) =>
+    typeof coordinates[0] === 'number'
+      ? [coordinates[0] * scaleX + translateX, coordinates[1] * scaleY + translateY]
+      : coordinates.map(decode)
+  const decodeGeometry = (geometry) => {
+    if (!geometry) return
+    if (geometry.geometries) geometry.geometries.forEach(decodeGeometry)
+    else geometry.coordinates = decode(geometry.coordinates)
+  }
+  object.features.forEach((feature) => decodeGeometry(feature.geometry))
+  delete object.transform
+}
+
+class QuantizedGeoJSONFormat extends GeoJSONFormat {
+  readFeaturesFromObject(object, options) {
+    if (object.transform) dequantize(object)
+    return super.readFeaturesFromObject(object, options)
+  }
+}
+
+const format = new QuantizedGeoJSONFormat()
 const widgets = {}
 let itemIcon
 
+// Load the features of the visible extent, simplified for the current resolution
+function createBboxSource(options) {
+  let loadedResolution
+  const source = new VectorSource({
+    format,
+    strategy: bboxStrategy,
+    url: (extent, resolution, projection) => {
+      loadedResolution = resolution
+      const url = new URL(options.url, window.location.href)
+      url.searchParams.set('bbox', extent.join(','))
+      url.searchParams.set('bbox-srid', projection.getCode().split(':').pop())
+      url.searchParams.set('resolution', resolution)
+      if (options.cluster) url.searchParams.set('cluster', '1')
+      return url.toString()
+    },
+  })
+  if (options.onFeaturesLoaded) {
+    source.on('featuresloadend', (e) => options.onFeaturesLoaded(e.features))
+  }
+  // The loaded extents cover the zoomed in views, reload the features to get them in more details.
+  // The clusters depend on the resolution, reload them on every zoom.
+  const reloadIfZoomedIn = (resolution) => {
+    if (
+      loadedResolution &&
+      (options.cluster ? resolution != loadedResolution : resolution < loadedResolution / 2)
+    ) {
+      loadedResolution = undefined
+      source.refresh()
+    }
+  }
+  return { source, reloadIfZoomedIn }
+}
+
 export function initMap(target, options) {
-  const source = new VectorSource()
-  let vectorLayer = createVectorLayer(source)
+  // Fitting the view on the features needs all of them
+  const tiled = options.tilesUrl && !options.fitSource
+  const bboxSource =
+    !tiled && options.url && options.bboxStrategy && !options.fitSource ? createBboxSource(options) : null
+  const source = bboxSource ? bboxSource.source : new VectorSource()
+  let vectorLayer = tiled ? createVectorTileLayer(options.tilesUrl) : createVectorLayer(source)
   const context = { feature: null }
   vectorLayer.setStyle(getStyleFunction({ context }))
 
@@ -34,7 +96,22 @@ export function initMap(target, options) {
     map.getView().fit(options.view.initialExtent)
   }
 
-  if (options.url)
+  if (bboxSource) {
+    map.on('moveend', () => bboxSource.reloadIfZoomedIn(map.getView().getResolution()))
+    if (options.cluster) {
+      // Drill down to the features of a cluster
+      map.on('singleclick', (e) => {
+        const feature = map.forEachFeatureAtPixel(e.pixel, (f) => f, { hitTolerance: 3 })
+        if (feature && feature.get('c2cgeoform_cluster') && feature.get('count') > 1) {
+          map.getView().fit(feature.get('extent'), {
+            duration: 250,
+            maxZoom: options.fitMaxZoom || 18,
+            padding: [40, 40, 40, 40],
+          })
+        }
+      })
+    }
+  } else if (options.url && !tiled)
     fetch(options.url)
       .then((resp) => resp.json())
       .then((json) => format.readFeatures(json))
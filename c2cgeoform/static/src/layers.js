@@ -2,6 +2,9 @@ import OSM from 'ol/source/OSM'
 import WMTS from 'ol/source/WMTS'
 import WMTSTileGrid from 'ol/tilegrid/WMTS'
 import VectorLayer from 'ol/layer/Vector'
+import VectorTileLayer from 'ol/layer/VectorTile'
+import VectorTileSource from 'ol/source/VectorTile'
+import MVT from 'ol/format/MVT'
 import TileLayer from 'ol/layer/Tile'
 import Image from 'ol/layer/Image'
 import XYZ from 'ol/source/XYZ'
@@ -27,6 +30,8 @@ export function createLayer(config) {
         url: config.url,
       })
       return new Image({ source })
+    case 'MVT':
+      return createVectorTileLayer(config.url, undefined, config.opacity || DEFAULT_OPACITY)
     case 'OSM':
     default:
       source = new OSM()
@@ -37,3 +42,8 @@ export function createLayer(config) {
 export function createVectorLayer(source, style) {
   return new VectorLayer({ source, style })
 }
+
+export function createVectorTileLayer(url, style, opacity) {
+  const source = new VectorTileSource({ format: new MVT(), url })
+  return new VectorTileLayer({ source, style, opacity })
+}
@@ -1,8 +1,11 @@
 import pprint
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Any, cast
 
 import deform
 import pyramid.response
+from sqlalchemy import event
 
 from c2cgeoform import JSONDict, JSONList
 
@@ -78,6 +81,29 @@ class AbstractViewsTests:
             assert total == json["total"]
         return json
 
+    @contextmanager
+    def count_queries(self, bind: Any) -> Iterator[list[str]]:
+        """Collect the SQL statements executed on ``bind`` (an engine, a connection or a session)."""
+        if hasattr(bind, "get_bind"):
+            bind = bind.get_bind()
+        statements: list[str] = []
+
+        def before_cursor_execute(*args: Any) -> None:
+            statements.append(args[2])
+
+        event.listen(bind, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+    def check_grid_queries(self, test_app: Any, dbsession: Any, max_queries: int, **kwargs: Any) -> Any:
+        """Check that a grid page issues at most ``max_queries`` SQL statements, to detect N+1 queries."""
+        with self.count_queries(dbsession) as statements:
+            json = self.check_search(test_app, **kwargs)
+        assert len(statements) <= max_queries, "\n\n".join(statements)
+        return json
+
     def check_checkboxes(self, form: deform.Form, name: str, expected: list[JSONDict]) -> None:
         for i, exp in enumerate(expected):
             field = form.get(name, index=i)
@@ -0,0 +1,83 @@
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from c2cgeoform.cache import DirectoryCache, TTLCache
+
+
+class TestTTLCache(TestCase):
+    def test_get_set(self):
+        cache = TTLCache()
+        assert cache.get("key") is None
+        assert cache.get("key", 0) == 0
+        cache.set("key", 42)
+        assert cache.get("key") == 42
+
+    def test_expired(self):
+        cache = TTLCache(ttl=10)
+        with patch("c2cgeoform.cache.time.monotonic", return_value=100):
+            cache.set("key", 42)
+            cache.set("other", 43, ttl=30)
+        with patch("c2cgeoform.cache.time.monotonic", return_value=120):
+            assert cache.get("key") is None
+            assert cache.get("other") == 43
+
+    def test_maxsize(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_discard_clear(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.discard("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestDirectoryCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name)
+
+    def test_write_read(self):
+        cache = DirectoryCache(self.path / "cache", ttl=60)
+        assert cache.read("name") is None
+        cache.write("name", b"content")
+        cache.write("file", BytesIO(b"file content"))
+        assert cache.read("name") == b"content"
+        assert cache.read("../cache/file") == b"file content"
+        # Only the marker of the collection is left beside the files
+        assert sorted(path.name for path in (self.path / "cache").iterdir()) == [".collected", "file", "name"]
+
+    def test_collect(self):
+        cache = DirectoryCache(self.path, ttl=60)
+        cache.write("old", b"old")
+        cache.write("used", b"used")
+        (self.path / ".partial").write_bytes(b"partial")
+        for name in ("old", "used", ".partial", ".collected"):
+            os.utime(self.path / name, (0, 0))
+        # Reading postpones the removal
+        with cache.open("used") as file_:
+            assert file_.read() == b"used"
+
+        cache.write("new", b"new")
+        assert cache.read("old") is None
+        assert cache.read("used") == b"used"
+        assert (self.path / ".partial").exists()
+
+        # Collected at most every ttl / 10 seconds
+        os.utime(self.path / "new", (0, 0))
+        cache.write("newer", b"newer")
+        assert cache.read("new") == b"new"
@@ -1,10 +1,13 @@
 import json
 
+import geoalchemy2
 import pytest
 from colander import Invalid, null
 from geoalchemy2 import WKBElement
 from geoalchemy2.shape import from_shape, to_shape
+from sqlalchemy import literal, select
 
+from c2cgeoform.models import DBSession
 from c2cgeoform.tests import DatabaseTestCase
 
 
@@ -39,6 +42,39 @@ class TestGeometry(DatabaseTestCase):
         assert round(geo_json["coordinates"][0], 7) == round(111319.49079327231, 7)
         assert round(geo_json["coordinates"][1], 7) == round(222684.20850554455, 7)
 
+    def test_serialize_fragment(self):
+        from c2cgeoform.ext.colander_ext import GeoJSONFragment, Geometry
+
+        fragment = GeoJSONFragment('{"type": "Point", "coordinates": [1, 2]}')
+        assert Geometry(srid=4326, map_srid=3857).serialize({}, fragment) is fragment
+
+    def test_geojson_expression(self):
+        from c2cgeoform.ext.colander_ext import Geometry
+
+        geom_schema = Geometry(srid=4326, map_srid=3857, db_encoding=True, max_decimal_digits=2)
+
+        from shapely.geometry.point import Point
+
+        wkb = from_shape(Point(1.0, 2.0), 4326)
+        geo_json = DBSession.execute(
+            select(geom_schema.geojson_expression(literal(wkb, geoalchemy2.Geometry("POINT", 4326))))
+        ).scalar()
+        assert json.loads(geo_json) == {"type": "Point", "coordinates": [111319.49, 222684.21]}
+
+    def test_serialize_rounded(self):
+        from c2cgeoform.ext.colander_ext import Geometry
+
+        geom_schema = Geometry(srid=4326, map_srid=3857, max_decimal_digits=1)
+
+        from shapely.geometry.point import Point
+
+        wkb = from_shape(Point(1.0, 2.0), 4326)
+        cstruct = geom_schema.serialize({}, wkb)
+        assert json.loads(cstruct) == {"type": "Point", "coordinates": [111319.5, 222684.2]}
+        assert geom_schema.is_unchanged({}, wkb, cstruct)
+        assert not geom_schema.is_unchanged({}, wkb, '{"type": "Point", "coordinates": [111319.5, 0]}')
+        assert not geom_schema.is_unchanged({}, None, cstruct)
+
     def test_serialize_invalid(self):
         from c2cgeoform.ext.colander_ext import Geometry
 
@@ -148,3 +184,26 @@ class TestBinaryData(DatabaseTestCase):
             assert len(binary.deserialize({}, file_)) == 95
             assert len(binary.deserialize({}, file_)) == 95
             assert len(binary.deserialize({}, file_)) == 95
+
+    def test_deserialize_max_size(self):
+        from io import BytesIO
+
+        from c2cgeoform.ext.colander_ext import BinaryData
+
+        binary = BinaryData(max_size=4)
+        assert binary.deserialize({}, BytesIO(b"data")) == b"data"
+        with pytest.raises(Invalid) as error:
+            binary.deserialize({}, BytesIO(b"too large"))
+        assert error.value.msg == "The file is too large, the maximum size is ${max_size} bytes."
+        assert error.value.msg.domain == "c2cgeoform"
+        assert error.value.msg.interpolate() == "The file is too large, the maximum size is 4 bytes."
+
+    def test_deserialize_stream(self):
+        from io import BytesIO
+
+        from c2cgeoform.ext.colander_ext import BinaryData
+
+        file_ = BytesIO(b"data")
+        file_.read()
+        assert BinaryData(stream=True).deserialize({}, file_) is file_
+        assert file_.tell() == 0
@@ -243,6 +243,191 @@ class TestRelationMultiSelect2Widget(DatabaseTestCase):
         assert result == [{"id": "1"}, {"id": "2"}]
 
 
+class TestRelationValuesCache:
+    def test_cache(self):
+        from sqlalchemy import Column, Integer, String, create_engine, event
+        from sqlalchemy.orm import DeclarativeBase, Session
+
+        from c2cgeoform.ext.deform_ext import RelationSelectWidget
+
+        class Base(DeclarativeBase):
+            pass
+
+        class District(Base):
+            __tablename__ = "district"
+            id = Column(Integer, primary_key=True)
+            name = Column(String)
+            description = Column(String)
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        widget = RelationSelectWidget(District, "id", "name", order_by="name", cache_ttl=60)
+
+        with Session(engine) as session:
+            session.add_all([District(id=1, name="b"), District(id=2, name="a")])
+            session.commit()
+            statements.clear()
+            widget.populate(session, None)
+            widget.populate(session, None)
+            assert widget.values == ((2, "a"), (1, "b"))
+            # Only the id and the label are selected, once
+            assert len(statements) == 1
+            assert "description" not in statements[0]
+
+            session.add(District(id=3, name="c"))
+            session.commit()
+            widget.populate(session, None)
+            assert widget.values == ((2, "a"), (1, "b"), (3, "c"))
+
+
+class TestFileUploadSpoolStore:
+    def test_roundtrip(self, tmp_path):
+        from io import BytesIO
+
+        from c2cgeoform.ext.deform_ext import FileUploadSpoolStore
+
+        session = DummySession()
+        store = FileUploadSpoolStore(session, tmp_path)
+        store["uid"] = {"fp": BytesIO(b"content"), "filename": "file.txt"}
+
+        # Only a handle in the session
+        handle = session["uid"]["fp"]
+        assert (tmp_path / handle["c2cgeoform_spool"]).read_bytes() == b"content"
+        assert session.saved
+
+        value = store.get("uid")
+        assert value["filename"] == "file.txt"
+        with value["fp"] as file_:
+            assert file_.read() == b"content"
+
+    def test_expired(self, tmp_path):
+        import os
+        from io import BytesIO
+
+        from c2cgeoform.ext.deform_ext import FileUploadSpoolStore
+
+        session = DummySession()
+        store = FileUploadSpoolStore(session, tmp_path, ttl=60)
+        store["old"] = {"fp": BytesIO(b"old")}
+        path = tmp_path / session["old"]["fp"]["c2cgeoform_spool"]
+        os.utime(path, (0, 0))
+        os.utime(tmp_path / ".collected", (0, 0))
+
+        # Files being written are kept
+        (tmp_path / ".tmp").write_bytes(b"partial")
+        os.utime(tmp_path / ".tmp", (0, 0))
+
+        store["new"] = {"fp": BytesIO(b"new")}
+        assert not path.exists()
+        assert (tmp_path / ".tmp").exists()
+        assert store.get("old") is None
+        with pytest.raises(KeyError):
+            store["old"]  # noqa: B018
+        with store["new"]["fp"] as file_:
+            assert file_.read() == b"new"
+
+        # Collected at most every ttl / 10 seconds
+        os.utime(tmp_path / session["new"]["fp"]["c2cgeoform_spool"], (0, 0))
+        store["newer"] = {"fp": BytesIO(b"newer")}
+        assert store.get("new") is not None
+
+    def test_get_upload_temp_store(self, tmp_path):
+        from c2cgeoform.ext.deform_ext import (
+            FileUploadSpoolStore,
+            FileUploadTempStore,
+            get_upload_temp_store,
+        )
+
+        request = DummyRequest()
+        assert type(get_upload_temp_store(request)) is FileUploadTempStore
+
+        request.registry.settings = {
+            "c2cgeoform.upload_temp_store": "spool",
+            "c2cgeoform.upload_temp_store.directory": str(tmp_path),
+            "c2cgeoform.upload_temp_store.ttl": "60",
+        }
+        store = get_upload_temp_store(request)
+        assert isinstance(store, FileUploadSpoolStore)
+        assert store.spool.directory == tmp_path
+        assert store.spool.ttl == 60
+
+        # The opened files are closed at the end of the request
+        from io import BytesIO
+
+        store["uid"] = {"fp": BytesIO(b"content")}
+        file_ = store["uid"]["fp"]
+        for callback in request.finished_callbacks:
+            callback(request)
+        assert file_.closed
+
+        request.registry.settings = {"c2cgeoform.upload_temp_store": "unknown"}
+        with pytest.raises(ValueError, match="Unknown upload temporary store"):
+            get_upload_temp_store(request)
+
+
+class TestFileUploadWidget:
+    def test_deserialize_max_size(self):
+        from io import BytesIO
+        from types import SimpleNamespace
+
+        import colander
+
+        from c2cgeoform.ext.deform_ext import FileUploadWidget
+
+        widget = FileUploadWidget()
+        widget.populate(None, DummyRequest())
+        widget.request.registry.settings = {"c2cgeoform.upload_max_size": "4"}
+        field = SimpleNamespace(schema=colander.SchemaNode(colander.Mapping()))
+        upload = SimpleNamespace(file=BytesIO(b"content"), filename="file.txt", type="text/plain", length=7)
+
+        with pytest.raises(colander.Invalid):
+            widget.deserialize(field, {"upload": upload})
+        assert widget.tmpstore.session == {}
+
+        widget.max_size = 10
+        value = widget.deserialize(field, {"upload": upload})
+        assert value["size"] == 7
+        assert value["data"].read() == b"content"
+
+    def test_serialize_thumbnail(self):
+        from unittest.mock import patch
+
+        from c2cgeoform.ext.deform_ext import FileUploadWidget
+
+        widget = FileUploadWidget(get_thumbnail_url=lambda request, id_: f"/thumbnails/{id_}")
+        widget.populate(None, DummyRequest())
+        renderer = DummyRenderer()
+        cstruct = {"id": 1, "filename": "photo.png", "mimetype": "image/png"}
+        widget.serialize(DummyField(renderer=renderer), dict(cstruct))
+        assert renderer.kw["thumbnail_url"] == "/thumbnails/1"
+
+        # Not shown without Pillow
+        with patch("c2cgeoform.thumbnails.Image", new=None):
+            widget.serialize(DummyField(renderer=renderer), dict(cstruct))
+        assert renderer.kw["thumbnail_url"] is None
+
+
+class DummySession(dict):
+    saved = False
+
+    def save(self):
+        self.saved = True
+
+
+class DummyRequest:
+    def __init__(self) -> None:
+        from types import SimpleNamespace
+
+        self.session = DummySession()
+        self.registry = SimpleNamespace(settings={})
+        self.finished_callbacks = []
+
+    def add_finished_callback(self, callback):
+        self.finished_callbacks.append(callback)
+
+
 def _convert_values(values_tuple):
     return [(str(key), label) for (key, label) in values_tuple]
 
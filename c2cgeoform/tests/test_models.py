@@ -0,0 +1,110 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from c2cgeoform.models import ContentAddressedFileData, FileBlob, FileData, delete_orphan_file_blobs
+from c2cgeoform.schema import GeoFormSchemaNode
+
+
+class _BlobBase(DeclarativeBase):
+    pass
+
+
+class Blob(FileBlob, _BlobBase):
+    __tablename__ = "blob"
+
+
+class Document(ContentAddressedFileData, _BlobBase):
+    __tablename__ = "document"
+    __file_blob__ = Blob
+
+
+class Attachment(FileData, _BlobBase):
+    __tablename__ = "attachment"
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    _BlobBase.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _blob_count(session):
+    return session.execute(select(func.count()).select_from(Blob)).scalar()
+
+
+class TestContentAddressedFileData:
+    def test_deduplicated(self, session):
+        session.add(Document(id=1, filename="a.pdf", data=b"content"))
+        session.add(Document(id=2, filename="b.pdf", data=BytesIO(b"content")))
+        session.commit()
+
+        assert _blob_count(session) == 1
+        first, second = session.get(Document, 1), session.get(Document, 2)
+        assert first.sha256 == second.sha256
+        assert second.data == b"content"
+
+    def test_update(self, session):
+        session.add(Document(id=1, data=b"old"))
+        session.commit()
+        document = session.get(Document, 1)
+        document.data = b"new"
+        session.commit()
+        document.filename = "new.pdf"
+        session.commit()
+
+        assert session.get(Document, 1).data == b"new"
+        assert delete_orphan_file_blobs(session, Blob, Document) == 1
+        assert _blob_count(session) == 1
+
+    def test_schema(self):
+        assert [node.name for node in GeoFormSchemaNode(Document).children] == [
+            "id",
+            "filename",
+            "mimetype",
+            "size",
+            "sha256",
+        ]
+
+
+class TestFileData:
+    def test_file(self, session):
+        file_ = BytesIO(b"content")
+        session.add(Attachment(id=1, filename="a.txt", data=file_))
+        session.commit()
+
+        assert session.get(Attachment, 1).data == b"content"
+        assert file_.tell() == 0
+
+    def test_sha256(self, session):
+        session.add(Attachment(id=1, data=b"content"))
+        session.add(Attachment(id=2, data=BytesIO(b"content")))
+        session.commit()
+
+        expected = hashlib.sha256(b"content").hexdigest()
+        assert session.get(Attachment, 1).sha256 == expected
+        assert session.get(Attachment, 2).sha256 == expected
+
+    def test_schema(self):
+        assert [node.name for node in GeoFormSchemaNode(Attachment).children] == [
+            "id",
+            "filename",
+            "mimetype",
+            "size",
+            "data",
+        ]
+
+    def test_content_addressed_file(self, session):
+        session.add(Document(id=1, data=b"content"))
+        session.commit()
+        session.add(Document(id=2, data=BytesIO(b"content")))
+        session.add(Document(id=3, data=BytesIO(b"other")))
+        session.commit()
+
+        assert _blob_count(session) == 2
+        assert session.get(Document, 3).data == b"other"
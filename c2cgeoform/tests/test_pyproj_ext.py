@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from shapely.geometry import Point, box
+from shapely.ops import transform
+
+from c2cgeoform.ext.pyproj_ext import get_transformer, transform_geometry
+
+
+class TestGetTransformer(TestCase):
+    def test_cached(self):
+        transformer = get_transformer(4326, 3857)
+        assert get_transformer(4326, 3857) is transformer
+        assert get_transformer(3857, 4326) is not transformer
+        x, y = transformer.transform(1.0, 2.0)
+        assert round(x, 7) == round(111319.49079327231, 7)
+        assert round(y, 7) == round(222684.20850554455, 7)
+
+    def test_per_thread(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(get_transformer, 4326, 3857).result()
+        assert get_transformer(4326, 3857) is not other
+
+
+class TestTransformGeometry(TestCase):
+    def test_polygon(self):
+        polygon = box(2600000, 1200000, 2601000, 1201000)
+        expected = transform(get_transformer(2056, 3857).transform, polygon)
+        assert transform_geometry(polygon, 2056, 3857).equals_exact(expected, 1e-6)
+
+    def test_z(self):
+        point = transform_geometry(Point(1.0, 2.0, 3.0), 4326, 3857)
+        assert point.has_z
+        assert point.z == 3.0
@@ -0,0 +1,73 @@
+import datetime as dt
+import decimal
+import json
+from unittest import TestCase
+
+import pytest
+from geojson import Feature, FeatureCollection
+from pyramid import testing
+from shapely.geometry import Point
+
+from c2cgeoform import _
+from c2cgeoform.renderers import OrjsonRenderer, json_renderer, json_serializer, stdlib_json_renderer
+
+VALUE = {
+    "features": FeatureCollection([Feature(id=1, geometry=Point(1, 2), properties={"name": "a"})]),
+    "date": dt.date(2020, 1, 2),
+    "decimal": decimal.Decimal("1.5"),
+    "geometry": Point(3, 4),
+}
+EXPECTED = {
+    "features": {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": 1,
+                "geometry": {"type": "Point", "coordinates": [1.0, 2.0]},
+                "properties": {"name": "a"},
+            },
+        ],
+    },
+    "date": "2020-01-02",
+    "decimal": 1.5,
+    "geometry": {"type": "Point", "coordinates": [3.0, 4.0]},
+}
+
+
+class TestRenderers(TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+        self.request = testing.DummyRequest()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_stdlib(self):
+        render = stdlib_json_renderer()(None)
+        assert json.loads(render(VALUE, {"request": self.request})) == EXPECTED
+        assert self.request.response.content_type == "application/json"
+
+    def test_orjson(self):
+        pytest.importorskip("orjson")
+        render = OrjsonRenderer()(None)
+        value = {**VALUE, "label": _("Submit"), 1: "key"}
+        assert json.loads(render(value, {"request": self.request})) == {
+            **EXPECTED,
+            "label": "Submit",
+            "1": "key",
+        }
+        assert self.request.response.content_type == "application/json"
+
+    def test_json_renderer(self):
+        assert not isinstance(json_renderer("json"), OrjsonRenderer)
+        with pytest.raises(ValueError, match="Unknown JSON renderer"):
+            json_renderer("unknown")
+
+    def test_json_serializer(self):
+        assert json.loads(json_serializer(self.request)(VALUE)) == EXPECTED
+
+        self.config.add_renderer("c2cgeoform_json", stdlib_json_renderer())
+        assert json.loads(json_serializer(self.request)(VALUE)) == EXPECTED
+        # Unlike the renderer, the serializer leaves the response alone
+        assert self.request.response.content_type != "application/json"
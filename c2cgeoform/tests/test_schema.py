@@ -4,9 +4,10 @@ from unittest.mock import patch
 
 import colander
 import pytest
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
 
-from c2cgeoform.models import Base
+from c2cgeoform.models import Base, FileData
 from c2cgeoform.schema import GeoFormSchemaNode
 
 
@@ -17,6 +18,44 @@ class FieldsCollection(Base):
     text = Column(String(length=4))
 
 
+class Attachment(FileData, Base):
+    __tablename__ = "tests_attachments"
+
+    folder_id = Column(Integer, ForeignKey("tests_folders.id"))
+
+
+class Folder(Base):
+    __tablename__ = "tests_folders"
+
+    id = Column(Integer, primary_key=True)
+    attachments = relationship(Attachment, cascade="all, delete-orphan")
+
+
+class TestDictify(unittest.TestCase):
+    def test_deferred_data_not_loaded(self):
+        folder = Folder(
+            id=1,
+            attachments=[Attachment(id=2, filename="a.png", mimetype="image/png", size=2)],
+        )
+        dict_ = GeoFormSchemaNode(Folder).dictify(folder)
+        attachment = dict_["attachments"][0]
+        assert attachment["data"] is colander.null
+        assert attachment["filename"] == "a.png"
+        assert attachment["mimetype"] == "image/png"
+        assert attachment["size"] == 2
+
+    def test_loaded_data(self):
+        folder = Folder(id=1, attachments=[Attachment(id=2, filename="a.png", data=b"xx")])
+        assert GeoFormSchemaNode(Folder).dictify(folder)["attachments"][0]["data"] == b"xx"
+
+    def test_data_kept_without_upload(self):
+        schema = GeoFormSchemaNode(Folder)
+        appstruct = schema.deserialize(
+            {"id": "1", "attachments": [{"id": "2", "filename": "a.png", "data": colander.null}]},
+        )
+        assert "data" not in appstruct["attachments"][0]
+
+
 class TestUniqueValidator(unittest.TestCase):
     def test_constraint_on_column_at_sql_alchemy_side_throw_colander_invalid(self):
         schema_node = GeoFormSchemaNode(FieldsCollection)
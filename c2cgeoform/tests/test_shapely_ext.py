@@ -0,0 +1,41 @@
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from shapely.geometry import GeometryCollection, Point, box
+
+from c2cgeoform.ext.shapely_ext import from_geojson, quantize, round_coordinates, to_geojson
+
+
+class TestShapelyExt(TestCase):
+    def test_round_coordinates(self):
+        assert round_coordinates(Point(1.2345, 6.789), 2).equals(Point(1.23, 6.79))
+
+    def test_round_coordinates_z(self):
+        geometry = round_coordinates(Point(1.2345, 6.789, 3.4567), 2)
+        assert geometry.has_z
+        assert geometry.coords[0] == (1.23, 6.79, 3.46)
+
+    def test_geojson(self):
+        for geometry in (Point(1.5, 2), Point(1, 2, 3), box(0, 0, 1, 1), GeometryCollection([Point(1, 2)])):
+            text = to_geojson(geometry)
+            assert json.loads(text)["type"] == geometry.geom_type
+            assert from_geojson(text).equals(geometry)
+
+    def test_geojson_fallback(self):
+        with patch("c2cgeoform.ext.shapely_ext._NATIVE_GEOJSON", new=False):
+            text = to_geojson(Point(1.5, 2))
+            assert json.loads(text) == {"type": "Point", "coordinates": [1.5, 2.0]}
+            assert from_geojson(text).equals(Point(1.5, 2))
+
+    def test_quantize(self):
+        transform, geometries = quantize([Point(2, 1), box(2, 1, 12, 6), None], 11)
+        assert transform == {"scale": [1.0, 0.5], "translate": [2.0, 1.0]}
+        assert geometries[0] == {"type": "Point", "coordinates": (0, 0)}
+        assert geometries[1]["coordinates"][0] == [(10, 0), (10, 10), (0, 10), (0, 0), (10, 0)]
+        assert geometries[2] is None
+
+    def test_quantize_single_point(self):
+        transform, geometries = quantize([Point(3, 4)], 1000)
+        assert transform == {"scale": [1.0, 1.0], "translate": [3.0, 4.0]}
+        assert geometries == [{"type": "Point", "coordinates": (0, 0)}]
@@ -0,0 +1,40 @@
+import os
+from io import BytesIO
+
+import pytest
+
+from c2cgeoform.thumbnails import ThumbnailCache, make_thumbnail
+
+
+class TestThumbnailCache:
+    def test_get_set(self, tmp_path):
+        cache = ThumbnailCache(tmp_path / "thumbnails")
+        assert cache.get("abc123", 128, "webp") is None
+        cache.set("abc123", 128, "webp", b"thumbnail")
+        assert cache.get("abc123", 128, "webp") == b"thumbnail"
+        assert cache.get("abc123", 512, "webp") is None
+
+    def test_invalid_key(self, tmp_path):
+        with pytest.raises(ValueError, match="Invalid thumbnail key"):
+            ThumbnailCache(tmp_path).get("../abc", 128, "webp")
+
+    def test_collect(self, tmp_path):
+        cache = ThumbnailCache(tmp_path, ttl=60)
+        cache.set("old", 128, "webp", b"old")
+        os.utime(tmp_path / "old-128.webp", (0, 0))
+        os.utime(tmp_path / ".collected", (0, 0))
+
+        cache.set("new", 128, "webp", b"new")
+        assert cache.get("old", 128, "webp") is None
+        assert cache.get("new", 128, "webp") == b"new"
+
+
+def test_make_thumbnail():
+    image_module = pytest.importorskip("PIL.Image")
+
+    source = BytesIO()
+    image_module.new("RGBA", (400, 200), (255, 0, 0, 128)).save(source, "PNG")
+    source.seek(0)
+    with image_module.open(BytesIO(make_thumbnail(source, 128, "jpeg"))) as thumbnail:
+        assert thumbnail.format == "JPEG"
+        assert thumbnail.size == (128, 64)
@@ -1,17 +1,33 @@
+import datetime as dt
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
 from functools import partial
 from itertools import groupby
 from unittest import TestCase
 from unittest.mock import Mock
+from urllib.parse import quote
 
+import colander
+import geoalchemy2
 import pytest
 from bs4 import BeautifulSoup
-from pyramid.httpexceptions import HTTPFound, HTTPNotFound
-
-from c2cgeoform.models import DBSession
+from pyramid.httpexceptions import HTTPBadRequest, HTTPFound, HTTPNotFound
+from pyramid.testing import DummyRequest
+from sqlalchemy import Column, Date, ForeignKey, Integer, Text, create_engine, event, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase, Session, relationship
+
+from c2cgeoform.ext.colander_ext import BinaryDataCopy, Geometry
+from c2cgeoform.ext.deform_ext import FileUploadTempStore, FileUploadWidget
+from c2cgeoform.models import DBSession, FileData
 from c2cgeoform.schema import GeoFormSchemaNode
 from c2cgeoform.tests import DatabaseTestCase
+from c2cgeoform.testing.views import AbstractViewsTests
 from c2cgeoform.tests.models_test import Person, Tag
-from c2cgeoform.views.abstract_views import AbstractViews, ListField
+from c2cgeoform.tests.test_deform_ext import DummySession
+from c2cgeoform.views.abstract_views import AbstractViews, ItemAction, ListField, _Explain, _stream_features
+from c2cgeoform.views.search import FullTextSearch, TrigramSearch
 
 _list_field = partial(ListField, Person)
 
@@ -24,6 +40,344 @@ class TestListField(TestCase):
     def test_title_default_to_attr_key(self):
         assert ListField(Tag, "id").label() == "id"
 
+    def test_dependencies(self):
+        assert ListField(Person, "name").dependencies()[0] is Person.name
+        assert ListField(Person, "name", renderer=str).dependencies() is None
+        dependencies = ListField(Person, "name", renderer=str, depends_on=["age"]).dependencies()
+        assert len(dependencies) == 1
+        assert dependencies[0] is Person.age
+
+    def test_relationships(self):
+        assert ListField(Person, "name").relationships() == []
+        [(tags,)] = ListField(Person, "tags").relationships()
+        assert tags is Person.tags
+        [(tags,)] = ListField(Person, "name", renderer=str, relationships=["tags"]).relationships()
+        assert tags is Person.tags
+
+
+def _compile(expression):
+    return str(expression.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+class TestSearchBackends(TestCase):
+    def test_trigram(self):
+        fields = [_list_field("name")]
+        assert _compile(TrigramSearch().filter(fields, "smith")) == "tests_persons.name %%> 'smith'"
+        assert _compile(TrigramSearch(word_similarity=False).rank(fields, "smith")) == (
+            "round(CAST(similarity(tests_persons.name, 'smith') AS NUMERIC), 6)"
+        )
+
+    def test_full_text(self):
+        fields = [_list_field("name")]
+        assert _compile(FullTextSearch(unaccent="f_unaccent").filter(fields, "jo o'neil")) == (
+            "to_tsvector('simple'::regconfig, f_unaccent(tests_persons.name)) @@ "
+            "to_tsquery('simple'::regconfig, f_unaccent('''jo'':* & ''o''''neil'':*'))"
+        )
+        with pytest.raises(ValueError, match="Invalid text search configuration"):
+            FullTextSearch(config="simple'; DROP TABLE x")
+
+    def test_index_supports(self):
+        assert TrigramSearch().index_supports("gin", "gin_trgm_ops")
+        assert FullTextSearch().index_supports("gin", "tsvector_ops")
+        assert not FullTextSearch().index_supports("btree", "tsvector_ops")
+        assert not FullTextSearch().index_supports("btree", "text_ops")
+
+
+class TestStreamFeatures(TestCase):
+    def test_feature_collection(self):
+        features = [json.dumps({"type": "Feature", "id": i}) for i in range(5)]
+        chunks = list(_stream_features(features, buffer_size=20))
+        assert len(chunks) > 1
+        assert [f["id"] for f in json.loads(b"".join(chunks))["features"]] == [0, 1, 2, 3, 4]
+        assert json.loads(b"".join(_stream_features([]))) == {"type": "FeatureCollection", "features": []}
+
+    def test_ndjson(self):
+        features = [json.dumps({"type": "Feature", "id": i}) for i in range(3)]
+        lines = b"".join(_stream_features(features, ndjson=True)).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [0, 1, 2]
+
+
+class _PlaceBase(DeclarativeBase):
+    pass
+
+
+class Place(_PlaceBase):
+    # Not created in the database, only used to build queries
+    __tablename__ = "tests_places"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(Text)
+    created = Column(Date)
+    location = Column(geoalchemy2.Geometry("POINT", 4326))
+
+
+class PlaceVisit(_PlaceBase):
+    __tablename__ = "tests_place_visits"
+
+    id = Column(Integer, primary_key=True)
+    place_id = Column(Integer, ForeignKey("tests_places.id"))
+    visitor = Column(Text)
+
+
+class GeometryViews(AbstractViews):
+    _model = Place
+    _id_field = "id"
+    _geometry_field = "location"
+    _list_fields = [ListField(Place, "name")]
+
+
+class VisitedPlacesViews(GeometryViews):
+    def _base_query(self):
+        # One row per visit
+        return self._request.dbsession.query(Place).join(PlaceVisit, PlaceVisit.place_id == Place.id)
+
+
+class EncodedGeometryViews(GeometryViews):
+    _base_schema = colander.SchemaNode(
+        colander.Mapping(),
+        colander.SchemaNode(colander.String(), name="name"),
+        colander.SchemaNode(Geometry("POINT", srid=4326, map_srid=2056, db_encoding=True), name="location"),
+    )
+
+
+class TestGeoJSONQuery(TestCase):
+    def test_geojson_query_bbox(self):
+        request = DummyRequest(dbsession=Session())
+        views = GeometryViews(request)
+        request.params = {"srid": "3857", "bbox": "0,0,10,10", "bbox-srid": "3857", "zoom": "1"}
+        sql = _compile(views._geojson_query().statement)
+        assert (
+            "ST_SimplifyPreserveTopology(ST_Transform(tests_places.location, 3857), 78271.51696402048)" in sql
+        )
+        assert (
+            "tests_places.location && ST_Transform(ST_MakeEnvelope(0.0, 0.0, 10.0, 10.0, 3857), 4326)" in sql
+        )
+
+        request.params = {"bbox": "0,0,10"}
+        with pytest.raises(HTTPBadRequest):
+            views._geojson_query()
+        request.params = {"resolution": "fine"}
+        with pytest.raises(HTTPBadRequest):
+            views._geojson_query()
+
+    def test_geojson_cluster_query(self):
+        request = DummyRequest(dbsession=Session())
+        views = GeometryViews(request)
+        request.params = {"srid": "2056", "resolution": "10", "cluster": "1"}
+        sql = _compile(views._geojson_cluster_query().statement)
+        assert "(array_agg(tests_places.id ORDER BY tests_places.id))[1:10]" in sql
+        assert "GROUP BY ST_SnapToGrid(ST_Centroid(ST_Transform(tests_places.location, 2056)), 400.0)" in sql
+
+        request.params = {"cluster": "1"}
+        with pytest.raises(HTTPBadRequest, match="resolution"):
+            views.geojson()
+
+    def test_map_cluster(self):
+        request = DummyRequest(dbsession=Session())
+        request.route_url = Mock(return_value="/geojson")
+        request.translate = str
+        views = GeometryViews(request)
+        assert "cluster" not in views.map()["map_options"]
+        views._map_cluster = True
+        map_options = views.map()["map_options"]
+        assert map_options["cluster"]
+        # Only the bbox source requests the clusters
+        assert map_options["bboxStrategy"]
+
+    def test_geojson_cluster_query_join(self):
+        request = DummyRequest(dbsession=Session())
+        request.params = {"srid": "2056", "resolution": "10", "cluster": "1"}
+        sql = _compile(VisitedPlacesViews(request)._geojson_cluster_query().statement)
+        # The features are counted once, whatever their number of visits
+        assert "count(*)" in sql
+        assert (
+            "FROM tests_places \nWHERE tests_places.id IN (SELECT tests_places.id \n"
+            "FROM tests_places JOIN tests_place_visits ON tests_place_visits.place_id = tests_places.id"
+        ) in sql
+
+    def test_geojson_feature_json(self):
+        views = GeometryViews(DummyRequest(dbsession=Session()))
+        views._list_fields = [ListField(Place, "name"), ListField(Place, "created")]
+        place = Place(id=1, name="a", created=dt.date(2020, 1, 2))
+        # Serialized like the c2cgeoform_json renderer
+        assert json.loads(views._geojson_feature_json((place, None))) == {
+            "type": "Feature",
+            "id": 1,
+            "geometry": None,
+            "properties": {"name": "a", "created": "2020-01-02"},
+        }
+
+    def test_geojson_stream_response(self):
+        request = DummyRequest(dbsession=Session())
+        request.params = {"format": "ndjson"}
+        response = GeometryViews(request)._geojson_stream_response()
+        assert response.content_type == "application/x-ndjson"
+        # Nothing is read before the response is written
+        assert isinstance(response.app_iter, Iterator)
+
+    def test_geojson_fragment_expressions(self):
+        views = EncodedGeometryViews(DummyRequest(dbsession=Session()))
+        expressions = views._geojson_fragment_expressions()
+        assert list(expressions) == ["location"]
+        assert _compile(expressions["location"]) == (
+            "ST_AsGeoJSON(ST_Transform(tests_places.location, 2056), 9)"
+        )
+        assert GeometryViews(DummyRequest(dbsession=Session()))._geojson_fragment_expressions() == {}
+
+    def test_tile_query(self):
+        views = GeometryViews(DummyRequest(dbsession=Session()))
+        sql = _compile(views._tile_query(3, 4, 2))
+        assert "ST_AsMVT(anon_1, 'tests_places', 4096, 'geometry')" in sql
+        assert "tests_places.id AS _id_, tests_places.name AS name" in sql
+        assert (
+            "ST_AsMVTGeom(ST_Transform(tests_places.location, 3857), ST_TileEnvelope(3, 4, 2), 4096, 64, true)"
+            in sql
+        )
+        assert (
+            "tests_places.location && ST_Transform(ST_Expand(ST_TileEnvelope(3, 4, 2), 78271.51696402048), 4326)"
+            in sql
+        )
+
+    def test_tiles_invalid(self):
+        request = DummyRequest(dbsession=Session())
+        request.matchdict = {"z": "1", "x": "2", "y": "0"}
+        with pytest.raises(HTTPNotFound):
+            GeometryViews(request).tiles()
+        request.matchdict = {"z": "1", "x": "a", "y": "0"}
+        with pytest.raises(HTTPBadRequest):
+            GeometryViews(request).tiles()
+
+
+class ReltuplesViews(GeometryViews):
+    _grid_total_strategy = "reltuples"
+    _grid_total_estimate_threshold = 0
+
+
+class TestGridTotal(TestCase):
+    def test_reltuples(self):
+        views = ReltuplesViews(DummyRequest(dbsession=Session()))
+        views._reltuples_estimate = Mock(return_value=100)
+        views._explain_estimate = Mock(return_value=10)
+        assert views._grid_total(views._base_query()) == (100, False)
+        # Estimated by the planner with conditions or joins
+        assert views._grid_total(views._base_query().filter(Place.name == "a")) == (10, False)
+        assert views._grid_total(VisitedPlacesViews._base_query(views)) == (10, False)
+        assert views._reltuples_estimate.call_count == 1
+
+
+class VisitorSearchViews(GeometryViews):
+    _search_backend = TrigramSearch()
+    _list_fields = [
+        ListField(Place, "name"),
+        ListField(Place, "id", key="visitors", renderer=str, filter_column=PlaceVisit.visitor),
+    ]
+
+    def _base_query(self):
+        return (
+            self._request.dbsession.query(Place)
+            .distinct()
+            .outerjoin(PlaceVisit, PlaceVisit.place_id == Place.id)
+        )
+
+
+class TestSearchRank(TestCase):
+    def test_joined_distinct(self):
+        views = VisitorSearchViews(DummyRequest(dbsession=Session()))
+        query = views._sort_query(views._filter_query(views._base_query(), "bob"), "", "", "bob")
+        sql = _compile(query.statement)
+        # One rank per place, in the selected columns
+        assert sql.startswith("SELECT DISTINCT tests_places.id, ")
+        assert "AS location, c2cgeoform_rank.rank \nFROM" in sql
+        assert (
+            "JOIN (SELECT DISTINCT tests_places.id AS _pk_0, max(round(CAST(greatest("
+            "word_similarity('bob', tests_places.name), word_similarity('bob', tests_place_visits.visitor)) "
+            "AS NUMERIC), 6)) AS rank"
+        ) in sql
+        assert (
+            "GROUP BY tests_places.id) AS c2cgeoform_rank ON tests_places.id = c2cgeoform_rank._pk_0" in sql
+        )
+        assert sql.endswith("ORDER BY c2cgeoform_rank.rank DESC")
+
+
+class TestExplain(TestCase):
+    def test_bound_parameters(self):
+        statement = (
+            Session().query(Place).filter(Place.id.in_([1, 2]), Place.name == "a").order_by(None).statement
+        )
+        compiled = _Explain(statement).compile(dialect=postgresql.psycopg.dialect())
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT tests_places.id")
+        # The expanding parameters are rendered on execution
+        assert "POSTCOMPILE" in str(compiled)
+        assert compiled.params == {"id_1": [1, 2], "name_1": "a"}
+
+
+class _FolderBase(DeclarativeBase):
+    pass
+
+
+class FolderFile(FileData, _FolderBase):
+    __tablename__ = "tests_folder_files"
+    __colanderalchemy_config__ = {"unknown": "preserve", "widget": FileUploadWidget()}
+
+    folder_id = Column(Integer, ForeignKey("tests_folders.id"))
+
+
+class Folder(_FolderBase):
+    __tablename__ = "tests_folders"
+
+    id = Column(Integer, primary_key=True)
+    files = relationship(FolderFile, cascade="all, delete-orphan")
+
+
+class TestDuplicateInDatabase(TestCase):
+    def test_duplicate(self):
+        engine = create_engine("sqlite://")
+        _FolderBase.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(Folder(id=1, files=[FolderFile(id=1, filename="a.png", size=3, data=b"abc")]))
+            session.commit()
+
+        with Session(engine) as session:
+            source = session.get(Folder, 1)
+            with session.no_autoflush:
+                copy = AbstractViews(DummyRequest()).copy_members_if_duplicates(source)
+            assert "data" not in inspect(source.files[0]).dict
+
+            # The form stores the source of the file in the temporary store
+            schema = GeoFormSchemaNode(Folder)
+            cstruct = schema.serialize(schema.dictify(copy))["files"][0]
+            assert isinstance(cstruct["data"], BinaryDataCopy)
+            widget = FolderFile.__colanderalchemy_config__["widget"]
+            widget.tmpstore = FileUploadTempStore(DummySession())
+            widget._store_copy(cstruct)
+            assert widget.tmpstore.session[cstruct["uid"]]["copy_of"] == [1]
+
+            # On save, the content is copied by the INSERT
+            field = Mock(schema=schema["files"].children[0])
+            value = widget.deserialize(field, {"uid": cstruct["uid"]})
+            folder = schema.objectify(schema.deserialize({"id": "2", "files": [value]}))
+            session.add(folder)
+            session.flush()
+            session.expire_all()
+            assert session.get(Folder, 2).files[0].data == b"abc"
+            assert session.get(Folder, 2).files[0].filename == "a.png"
+
+
+@contextmanager
+def _statements(engine):
+    """Collect the statements executed on the engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        del conn, cursor, args  # unused
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
 
 class ConcreteViews(AbstractViews):
     _model = Person
@@ -32,6 +386,61 @@ class ConcreteViews(AbstractViews):
     _base_schema = GeoFormSchemaNode(Person, title="Person")
 
 
+class CustomActionsViews(ConcreteViews):
+    _grid_format = "compact"
+
+    def _item_actions(self, item, readonly=False):
+        return [*super()._item_actions(item, readonly), ItemAction("print", url="/print")]
+
+
+class KeysetViews(ConcreteViews):
+    _grid_keyset_pagination = True
+
+
+class CachedTotalViews(ConcreteViews):
+    _grid_total_strategy = "cached"
+
+
+class ExplainTotalViews(ConcreteViews):
+    _grid_total_strategy = "explain"
+    _grid_total_estimate_threshold = 0
+
+
+class TrigramViews(ConcreteViews):
+    _search_backend = TrigramSearch()
+
+
+class TagsViews(ConcreteViews):
+    _list_fields = [
+        _list_field("name"),
+        _list_field(
+            "tags", renderer=lambda person: ", ".join(t.name for t in person.tags), depends_on=["tags"]
+        ),
+    ]
+
+
+class DistinctViews(ConcreteViews):
+    def _base_query(self):
+        return super()._base_query().distinct().outerjoin(Person.tags)
+
+
+class RankedDistinctViews(DistinctViews):
+    _search_backend = FullTextSearch(unaccent=None)
+    _list_fields = [
+        *ConcreteViews._list_fields,
+        _list_field(
+            "tags",
+            renderer=lambda person: ", ".join(t.name for t in person.tags),
+            depends_on=["tags"],
+            filter_column=Tag.name,
+        ),
+    ]
+
+
+class RankedDistinctKeysetViews(RankedDistinctViews):
+    _grid_keyset_pagination = True
+
+
 class TestAbstractViews(DatabaseTestCase):
     def _add_test_persons(self):
         self.person1 = Person(name="Smith", first_name="Peter")
@@ -89,6 +498,42 @@ class TestAbstractViews(DatabaseTestCase):
         assert len(grouped_by_count) == 1
         assert grouped_by_count[0] == 5
 
+    def test_grid_compact(self):
+        self.request.route_url = Mock(
+            side_effect=lambda name, **kwargs: f"/{name}/{quote(str(kwargs['id']))}"
+        )
+        self._add_test_persons()
+
+        self.request.params = {"offset": "0", "limit": "5", "format": "compact"}
+        response = ConcreteViews(self.request).grid()
+
+        assert response["total"] == 22
+        assert len(response["rows"]) == 5
+        assert response["rows"][0]["actions"] == ["edit", "duplicate", "delete"]
+        templates = response["action_templates"]
+        assert templates["edit"]["url"] == "/c2cgeoform_item/{id}"
+        assert templates["duplicate"]["url"] == "/c2cgeoform_item_duplicate/{id}"
+        assert templates["delete"]["method"] == "DELETE"
+        assert response["dblclick_template"] == "/c2cgeoform_item/{id}"
+        # The URLs are only generated once per response
+        assert self.request.route_url.call_count == 4
+
+    def test_grid_compact_custom_actions(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+
+        self.request.params = {"offset": "0", "limit": "5", "format": "compact"}
+        response = CustomActionsViews(self.request).grid()
+
+        assert "action_templates" not in response
+        assert [action["name"] for action in response["rows"][0]["actions"]["dropdown"]] == [
+            "edit",
+            "duplicate",
+            "delete",
+            "print",
+        ]
+        assert CustomActionsViews(self.request).index()["grid_format"] == "verbose"
+
     def test_grid_without_parameters(self):
         self.request.route_url = Mock(return_value="person/1")
         self._add_test_persons()
@@ -105,6 +550,174 @@ class TestAbstractViews(DatabaseTestCase):
         response = views.grid()
         assert response["total"] == 22
 
+    def test_grid_window_count(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+        views = ConcreteViews(self.request)
+        assert views._window_count_safe(views._base_query())
+
+        self.request.params = {"offset": "20", "limit": "5"}
+        response = ConcreteViews(self.request).grid()
+        assert response["total"] == 22
+        assert len(response["rows"]) == 2
+
+        self.request.params = {"offset": "25", "limit": "5"}
+        response = ConcreteViews(self.request).grid()
+        assert response["total"] == 22
+        assert response["rows"] == []
+
+    def test_grid_window_count_distinct(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+        self.person1.tags = DBSession.query(Tag).all()
+        DBSession.flush()
+
+        views = DistinctViews(self.request)
+        assert not views._window_count_safe(views._base_query())
+        self.request.params = {"offset": "0", "limit": "5", "sort": "name", "order": "desc"}
+        with _statements(DBSession.get_bind()) as statements:
+            response = views.grid()
+        assert response["total"] == 22
+        assert [row["name"] for row in response["rows"]] == ["Wayne", "Venetta", "Vada", "Sulema", "Smith"]
+        # The total is counted in the statement of the rows
+        assert len(statements) == 1
+
+    def test_grid_total_cached(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+        self.request.params = {"offset": "0", "limit": "5", "search": "Lash"}
+        response = CachedTotalViews(self.request).grid()
+        assert response["total"] == 2
+        assert response["total_exact"]
+
+        DBSession.add(Person(name="Lashley", first_name="Ann"))
+        DBSession.flush()
+        assert CachedTotalViews(self.request).grid()["total"] == 2
+        assert ConcreteViews(self.request).grid()["total"] == 3
+
+    def test_grid_total_explain(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+        self.request.params = {"offset": "0", "limit": "5"}
+        response = ExplainTotalViews(self.request).grid()
+        assert not response["total_exact"]
+        assert isinstance(response["total"], int)
+        assert len(response["rows"]) == 5
+
+        # With bound parameters
+        self.request.params = {"offset": "0", "limit": "5", "search": "smith"}
+        assert isinstance(ExplainTotalViews(self.request).grid()["total"], int)
+
+    def test_grid_search_rank(self):
+        views = TrigramViews(self.request)
+        query, rank = views._search_rank(views._base_query(), "", "smith")
+        assert _compile(rank) == (
+            "round(CAST(greatest(word_similarity('smith', tests_persons.name), "
+            "word_similarity('smith', tests_persons.first_name)) AS NUMERIC), 6)"
+        )
+        # Only the model table, the query is kept
+        assert _compile(query.statement) == _compile(views._base_query().statement)
+        keys = views._sort_keys("", "", rank)
+        assert len(keys) == 1
+        assert keys[0] == (rank, True)
+        assert views._search_rank(views._base_query(), "name", "smith")[1] is None
+        assert ConcreteViews(self.request)._search_rank(views._base_query(), "", "smith")[1] is None
+
+    def test_grid_search_rank_distinct(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+        tags = DBSession.query(Tag).order_by(Tag.id).all()
+        self.person1.tags = tags
+        DBSession.query(Person).filter(Person.name == "Wayne").one().tags = tags[:1]
+        DBSession.flush()
+
+        # One row per person, whatever their number of matching tags
+        self.request.params = {"offset": "0", "limit": "5", "search": "tag"}
+        response = RankedDistinctViews(self.request).grid()
+        assert response["total"] == 2
+        assert sorted(row["name"] for row in response["rows"]) == ["Smith", "Wayne"]
+
+        response = RankedDistinctKeysetViews(self.request).grid()
+        assert response["total"] == 2
+        assert sorted(row["name"] for row in response["rows"]) == ["Smith", "Wayne"]
+
+    def test_missing_search_indexes(self):
+        views = ConcreteViews(self.request)
+        assert views._missing_search_indexes() == ["tests_persons.name", "tests_persons.first_name"]
+
+    def test_geojson_feature_json(self):
+        self._add_test_persons()
+        DBSession.flush()
+        views = ConcreteViews(self.request)
+        views._geojson_db_encoding = True
+        geometry = '{"type":"Point","coordinates":[1,2]}'
+        feature = json.loads(views._geojson_feature_json((self.person1, geometry)))
+        assert feature == {
+            "type": "Feature",
+            "id": self.person1.id,
+            "geometry": {"type": "Point", "coordinates": [1, 2]},
+            "properties": {"name": "Smith", "first_name": "Peter"},
+        }
+        assert json.loads(views._geojson_feature_json((self.person1, None)))["geometry"] is None
+
+    def test_grid_load_only(self):
+        self._add_test_persons()
+        DBSession.flush()
+        DBSession.expunge_all()
+
+        views = ConcreteViews(self.request)
+        person = views._project_query(views._base_query()).first()
+        unloaded = inspect(person).unloaded
+        assert "age" in unloaded
+        assert "hash" in unloaded
+        assert "name" not in unloaded
+        assert "id" not in unloaded
+
+    def test_grid_eager_load(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+        for person in DBSession.query(Person):
+            person.tags = DBSession.query(Tag).all()[:2]
+        DBSession.flush()
+        DBSession.expunge_all()
+
+        self.request.params = {"offset": "0", "limit": "10"}
+        with AbstractViewsTests().count_queries(DBSession) as statements:
+            response = TagsViews(self.request).grid()
+        assert len(statements) == 2
+        assert sorted(response["rows"][0]["tags"].split(", ")) == ["Tag A", "Tag B"]
+
+    def _grid_names(self, views_class, **params):
+        self.request.params = {"limit": "5", "sort": "name", "order": "desc", **params}
+        return views_class(self.request).grid()
+
+    def test_grid_keyset(self):
+        self.request.route_url = Mock(return_value="person/1")
+        self._add_test_persons()
+
+        expected = [
+            [row["name"] for row in self._grid_names(ConcreteViews, offset=str(offset))["rows"]]
+            for offset in range(0, 22, 5)
+        ]
+
+        response = self._grid_names(KeysetViews, offset="0")
+        assert response["total"] == 22
+        pages = [[row["name"] for row in response["rows"]]]
+        while response["next"] is not None:
+            response = self._grid_names(KeysetViews, after=response["next"])
+            if response["rows"]:
+                pages.append([row["name"] for row in response["rows"]])
+        assert pages == expected
+
+        response = self._grid_names(KeysetViews, offset="5")
+        response = self._grid_names(KeysetViews, before=response["previous"])
+        assert [row["name"] for row in response["rows"]] == expected[0]
+
+    def test_grid_keyset_invalid_cursor(self):
+        self.request.route_url = Mock(return_value="person/1")
+        with pytest.raises(HTTPBadRequest):
+            self._grid_names(KeysetViews, after="not a cursor")
+
     def test_new_get(self):
         self.request.matched_route = Mock(name="c2cgeoform_item")
         self.request.route_url = Mock(return_value="person/new/edit")
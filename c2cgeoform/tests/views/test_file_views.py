@@ -0,0 +1,125 @@
+import hashlib
+
+import pytest
+import webob
+from pyramid import testing
+from pyramid.httpexceptions import HTTPNotFound
+from sqlalchemy import Column, Integer, LargeBinary, bindparam, create_engine, event, func, select, update
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from c2cgeoform.models import FileData
+from c2cgeoform.views.file_views import FileChangedError, FileDataViews, _FileIter
+
+_CONTENT = bytes(range(256)) * 4
+
+
+class _FileBase(DeclarativeBase):
+    pass
+
+
+class File(_FileBase):
+    __tablename__ = "file"
+    id = Column(Integer, primary_key=True)
+    data = Column(LargeBinary)
+
+
+class Photo(FileData, _FileBase):
+    __tablename__ = "photo"
+
+
+class PhotoViews(FileDataViews):
+    _model = Photo
+    _file_chunk_size = 300
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'files.db'}")
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        del connection_record  # unused
+        # Not available in the SQLite of the tests
+        dbapi_connection.create_function("md5", 1, lambda data: hashlib.md5(data).hexdigest())  # noqa: S324
+        dbapi_connection.create_function("octet_length", 1, len)
+
+    _FileBase.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(File(id=1, data=_CONTENT))
+        session.add(Photo(id=1, filename="é.png", mimetype="image/png", data=_CONTENT))
+        session.commit()
+    return engine
+
+
+def _content():
+    return select(
+        func.substr(File.data, bindparam("offset", type_=Integer), bindparam("length", type_=Integer)),
+    ).where(File.id == 1)
+
+
+class TestFileIter:
+    def test_chunks(self, engine):
+        chunks = list(_FileIter(engine, _content(), 0, len(_CONTENT), 300))
+        assert [len(chunk) for chunk in chunks] == [300, 300, 300, 124]
+        assert b"".join(chunks) == _CONTENT
+
+    def test_range(self, engine):
+        file_iter = _FileIter(engine, _content(), 0, len(_CONTENT), 300).app_iter_range(250, 700)
+        assert b"".join(file_iter) == _CONTENT[250:700]
+
+    def test_short_chunk(self, engine):
+        file_iter = iter(_FileIter(engine, _content(), 0, len(_CONTENT) + 100, 300))
+        assert len(b"".join(next(file_iter) for _ in range(3))) == 900
+        with pytest.raises(FileChangedError):
+            next(file_iter)
+
+
+class TestFileDataViews:
+    @staticmethod
+    def _get(engine, id_="1", **headers):
+        request = testing.DummyRequest(dbsession=Session(engine), matchdict={"id": id_})
+        response = PhotoViews(request).download()
+        return webob.Request.blank("/", headers=headers).get_response(response)
+
+    def test_download(self, engine):
+        response = self._get(engine)
+        assert response.status_int == 200
+        assert response.body == _CONTENT
+        assert response.etag == hashlib.sha256(_CONTENT).hexdigest()
+        assert response.content_type == "image/png"
+        assert response.content_length == len(_CONTENT)
+        assert response.content_disposition == "inline; filename*=UTF-8''%C3%A9.png"
+        assert response.accept_ranges == "bytes"
+        assert response.headers["Cache-Control"] == "max-age=86400, private"
+
+    def test_range(self, engine):
+        response = self._get(engine, Range="bytes=250-699")
+        assert response.status_int == 206
+        assert response.body == _CONTENT[250:700]
+        assert response.content_range.start == 250
+        assert response.content_range.stop == 700
+
+    def test_not_modified(self, engine):
+        response = self._get(engine, **{"If-None-Match": f'"{hashlib.sha256(_CONTENT).hexdigest()}"'})
+        assert response.status_int == 304
+        assert response.body == b""
+
+    def test_not_stored_hash(self, engine):
+        with Session(engine) as session:
+            session.execute(update(Photo).values(sha256=None))
+            session.commit()
+        response = self._get(engine)
+        assert response.etag == hashlib.md5(_CONTENT).hexdigest()  # noqa: S324
+
+    def test_changed(self, engine):
+        request = testing.DummyRequest(dbsession=Session(engine), matchdict={"id": "1"})
+        response = PhotoViews(request).download()
+        with Session(engine) as session:
+            session.execute(update(Photo).values(data=_CONTENT[::-1], sha256="updated"))
+            session.commit()
+        with pytest.raises(FileChangedError):
+            list(response.app_iter)
+
+    def test_not_found(self, engine):
+        with pytest.raises(HTTPNotFound):
+            self._get(engine, id_="2")
@@ -0,0 +1,75 @@
+import logging
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Any
+
+from c2cgeoform.cache import DirectoryCache
+
+_LOGGER = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None  # type: ignore[assignment]
+    ImageOps = None  # type: ignore[assignment]
+
+# Content type of the thumbnail formats
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+def make_thumbnail(file_: IO[bytes], size: int, format_: str) -> bytes:
+    """Get a thumbnail of the image ``file_`` fitting in a ``size`` pixels square, encoded in ``format_``."""
+    if Image is None:
+        message = "Pillow is required to create the thumbnails"
+        raise RuntimeError(message)
+    with Image.open(file_) as source:
+        # Let the JPEG decoder reduce the image while reading it
+        source.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((size, size))
+        if format_ == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        output = BytesIO()
+        image.save(output, format_.upper())
+        return output.getvalue()
+
+
+class ThumbnailCache(DirectoryCache):
+    """
+    Cache of the thumbnails in a directory, that can be shared by several workers (or hosts).
+
+    The thumbnails are keyed by the hash of the source content, so they are not used anymore when the
+    content changes, and removed after ``ttl`` seconds without access.
+    """
+
+    def __init__(self, directory: str | Path, ttl: float = 7 * 86400) -> None:
+        super().__init__(directory, ttl)
+
+    @staticmethod
+    def _name(key: str, size: int, format_: str) -> str:
+        if not key.isalnum():
+            message = f"Invalid thumbnail key: {key}"
+            raise ValueError(message)
+        return f"{key}-{size}.{format_}"
+
+    def get(self, key: str, size: int, format_: str) -> bytes | None:
+        return self.read(self._name(key, size, format_))
+
+    def set(self, key: str, size: int, format_: str, data: bytes) -> None:
+        self.write(self._name(key, size, format_), data)
+
+
+def get_thumbnail_cache(settings: dict[str, Any]) -> ThumbnailCache:
+    """
+    Get the thumbnail cache configured by the settings.
+
+    ``c2cgeoform.thumbnails.directory`` defaults to ``c2cgeoform_thumbnails`` in the temporary directory,
+    ``c2cgeoform.thumbnails.ttl`` (in seconds) to a week.
+    """
+    return ThumbnailCache(
+        settings.get(
+            "c2cgeoform.thumbnails.directory", Path(tempfile.gettempdir()) / "c2cgeoform_thumbnails"
+        ),
+        float(settings.get("c2cgeoform.thumbnails.ttl", 7 * 86400)),
+    )
@@ -1,8 +1,13 @@
+import base64
+import binascii
+import json
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
 from typing import (
     Any,
     ClassVar,
+    Literal,
+    NotRequired,
     TypedDict,
     TypeVar,
     Union,
@@ -22,19 +27,43 @@ from deform import Form, ValidationFailure  # , ZPTRendererFactory
 from deform.form import Button
 from geoalchemy2.elements import WKBElement
 from geoalchemy2.shape import to_shape
+from geoalchemy2.types import Geography, Geometry
 from geojson import Feature, FeatureCollection
-from pyramid.httpexceptions import HTTPFound, HTTPInternalServerError, HTTPNotFound
-from sqlalchemy import desc, or_, types
+from pyramid.httpexceptions import HTTPBadRequest, HTTPFound, HTTPInternalServerError, HTTPNotFound
+from shapely.geometry.base import BaseGeometry
+from sqlalchemy import and_, desc, false, func, literal, or_, select, text, true, types
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import defer, joinedload, load_only, selectinload
 from sqlalchemy.orm.properties import ColumnProperty
 from sqlalchemy.orm.relationships import RelationshipProperty
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from translationstring import TranslationString
 
 from c2cgeoform import JSON, JSONDict, JSONList, _, default_map_settings
+from c2cgeoform.cache import TTLCache
+from c2cgeoform.ext import colander_ext
+from c2cgeoform.ext.shapely_ext import quantize, round_coordinates, to_geojson
+from c2cgeoform.renderers import json_serializer
+from c2cgeoform.views.search import ILikeSearch, SearchBackend
 
 _LOGGER = logging.getLogger(__name__)
 
+_TOTAL_CACHE = TTLCache(maxsize=1024)
+
+_WEB_MERCATOR_RESOLUTION = 156543.03392804097  # Meters per pixel at zoom 0 of the 256 pixels tile grid
+_WEB_MERCATOR_SIZE = 40075016.68557849  # Meters covered by the tile at zoom 0
+
+_INVALID_CURSOR_MSG = "Invalid cursor"
+_INVALID_BBOX_MSG = "Invalid bbox, expected minx,miny,maxx,maxy"
+_INVALID_TILE_MSG = "Invalid tile coordinates"
+_CLUSTER_RESOLUTION_MSG = "The clusters need a resolution or a zoom"
+_INVALID_QUANTIZATION_MSG = "The quantization should be at least 2"
+
 _DB_ERR_MSG = """\
 Pyramid is having a problem using your SQL database.  The problem
 might be caused by one of the following things:
@@ -86,6 +115,9 @@ def model_attr_info(
 T = TypeVar("T", bound=type)
 
 
+RelationshipPath = tuple[sqlalchemy.orm.attributes.InstrumentedAttribute[Any], ...]
+
+
 def _getattr[T: type](
     model: type[T] | None,
     attr: sqlalchemy.schema.Column[Any] | str | None,
@@ -97,6 +129,120 @@ def _getattr[T: type](
     return cast("sqlalchemy.schema.Column[Any]", getattr(model, attr))
 
 
+def _relationship_path[T: type](model: type[T] | None, path: str) -> RelationshipPath:
+    """Get the relationship attributes of a dotted path like ``situations.type`` from ``model``."""
+    assert model is not None
+    attributes = []
+    for name in path.split("."):
+        attribute = getattr(model, name)
+        attributes.append(attribute)
+        model = attribute.property.mapper.class_
+    return tuple(attributes)
+
+
+SortKey = tuple[sqlalchemy.sql.expression.ColumnElement[Any], bool]  # (expression, descending)
+
+
+def _sort_key(
+    order_field: sqlalchemy.sql.elements.ColumnClause[Any] | sqlalchemy.sql.elements.ColumnElement[Any],
+) -> SortKey:
+    """Split an ``order_by`` expression like ``desc(column)`` into its column and direction."""
+    if isinstance(order_field, sqlalchemy.sql.expression.UnaryExpression):
+        if order_field.modifier is operators.desc_op:
+            return order_field.element, True
+        if order_field.modifier is operators.asc_op:
+            return order_field.element, False
+    return order_field, False
+
+
+def _keyset_after(
+    column: sqlalchemy.sql.expression.ColumnElement[Any],
+    value: Any,
+    descending: bool,
+) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+    """
+    Get the condition for rows coming strictly after ``value`` in the ordering of ``column``.
+
+    Follows the PostgreSQL default: ``NULLS LAST`` for ascending and ``NULLS FIRST`` for descending order.
+    """
+    if descending:
+        return column.is_not(None) if value is None else column < value
+    return false() if value is None else or_(column > value, column.is_(None))
+
+
+def _keyset_filter(
+    keys: list[SortKey],
+    values: list[Any],
+) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+    """Get the condition for rows coming strictly after the ``values`` of the sort ``keys``."""
+    conditions = []
+    for index, (column, descending) in enumerate(keys):
+        equals = [
+            previous.is_(None) if value is None else previous == value
+            for (previous, _descending), value in zip(keys[:index], values[:index], strict=True)
+        ]
+        conditions.append(and_(*equals, _keyset_after(column, values[index], descending)))
+    return or_(*conditions)
+
+
+def _stream_features(
+    features: Iterable[str],
+    ndjson: bool = False,
+    buffer_size: int = 65536,
+) -> Iterator[bytes]:
+    """
+    Assemble the serialized features in a FeatureCollection, or in newline-delimited GeoJSON.
+
+    The output is yielded in chunks of about ``buffer_size`` characters.
+    """
+    buffer: list[str] = [] if ndjson else ['{"type": "FeatureCollection", "features": [']
+    size = 0
+    first = True
+    for feature in features:
+        if ndjson:
+            buffer.append(feature + "\n")
+        else:
+            buffer.append(feature if first else "," + feature)
+        first = False
+        size += len(feature) + 1
+        if size >= buffer_size:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    if not ndjson:
+        buffer.append("]}")
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _encode_cursor(values: list[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as exception:
+        raise HTTPBadRequest(_INVALID_CURSOR_MSG) from exception
+    if not isinstance(values, list):
+        raise HTTPBadRequest(_INVALID_CURSOR_MSG)
+    return values
+
+
+class _Explain(Executable, ClauseElement):  # type: ignore[misc]
+    """``EXPLAIN (FORMAT JSON)`` of a statement, its parameters are bound as in the statement."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: sqlalchemy.sql.expression.Select[Any]) -> None:
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler: Any, **kw: Any) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
 class ListField[T: type]:
     def __init__(
         self,
@@ -112,7 +258,20 @@ class ListField[T: type]:
         | sqlalchemy.orm.attributes.InstrumentedAttribute[Any]
         | None = None,
         visible: bool = True,
+        depends_on: list[str | sqlalchemy.orm.attributes.InstrumentedAttribute[Any]] | None = None,
+        relationships: list[str | RelationshipPath] | None = None,
     ) -> None:
+        """
+        Create a list field.
+
+        ``depends_on`` are the model attributes used by a custom ``renderer``, they are loaded with the
+        list rows. Without it, a field with a custom ``renderer`` loads the full entities.
+
+        ``relationships`` are the relationship paths traversed by the ``renderer``, like
+        ``"situations.type"`` or ``(Excavation.situations, Situation.type)``, they are eagerly loaded
+        with the list rows. The relationships of the field attribute and of ``depends_on`` are
+        included.
+        """
         self._attr = _getattr(model, attr)
         self._key = key or self._attr.key
         self._label = label or model_attr_info(self._attr, "colanderalchemy", "title") or self._key
@@ -123,6 +282,16 @@ class ListField[T: type]:
             filter_column if filter_column is not None else self._attr if is_column else None
         )
         self._visible = visible
+        self._depends_on = (
+            None
+            if depends_on is None
+            else [_getattr(model, dep) if isinstance(dep, str) else dep for dep in depends_on]
+        )
+        self._default_renderer = renderer is None
+        self._relationships = [
+            _relationship_path(model, path) if isinstance(path, str) else tuple(path)
+            for path in relationships or []
+        ]
 
     def _prop_renderer(self, entity: T) -> str:
         value = None
@@ -155,6 +324,12 @@ class ListField[T: type]:
         assert self._sort_column is not None
         return self._sort_column
 
+    def filter_column(
+        self,
+    ) -> sqlalchemy.sql.expression.ColumnElement[Any] | sqlalchemy.orm.attributes.InstrumentedAttribute[Any]:
+        assert self._filter_column is not None
+        return self._filter_column
+
     def filter_expression(self, term: str) -> sqlalchemy.sql.expression.BinaryExpression[bool]:
         assert self._filter_column is not None
         return self._filter_column.ilike(term)
@@ -162,6 +337,39 @@ class ListField[T: type]:
     def visible(self) -> bool:
         return self._visible
 
+    def dependencies(self) -> list[sqlalchemy.orm.attributes.InstrumentedAttribute[Any]] | None:
+        """Get the model attributes needed to render the value, ``None`` when unknown."""
+        dependencies = list(self._depends_on or [])
+        if self._default_renderer:
+            if not isinstance(self._attr, sqlalchemy.orm.attributes.InstrumentedAttribute):
+                return None
+            dependencies.insert(0, self._attr)
+        elif self._depends_on is None:
+            return None
+        return dependencies
+
+    def column(self) -> sqlalchemy.orm.attributes.InstrumentedAttribute[Any] | None:
+        """Get the model column whose value is the field value, ``None`` for the computed fields."""
+        if (
+            self._default_renderer
+            and isinstance(self._attr, sqlalchemy.orm.attributes.InstrumentedAttribute)
+            and isinstance(self._attr.property, ColumnProperty)
+            and not isinstance(self._attr.type, Geometry | Geography)
+        ):
+            return self._attr
+        return None
+
+    def relationships(self) -> list[RelationshipPath]:
+        """Get the relationship paths to eagerly load to render the value."""
+        return [
+            *[
+                (dependency,)
+                for dependency in self.dependencies() or []
+                if isinstance(dependency.property, RelationshipProperty)
+            ],
+            *self._relationships,
+        ]
+
 
 class ItemAction:
     def __init__(
@@ -234,11 +442,19 @@ class UserMessage:
 class IndexResponse[T: type](TypedDict):
     grid_actions: list[ItemAction]
     list_fields: list[ListField[T]]
+    keyset_pagination: NotRequired[bool]
+    grid_format: NotRequired[str]
+    estimated_total_format: NotRequired[str]
 
 
 class GridResponse(TypedDict):
     rows: JSONList
     total: int
+    total_exact: NotRequired[bool]
+    previous: NotRequired[str | None]  # keyset pagination cursors
+    next: NotRequired[str | None]
+    action_templates: NotRequired[dict[str, JSONDict]]  # compact format
+    dblclick_template: NotRequired[str]
 
 
 class MapResponse(TypedDict):
@@ -275,6 +491,36 @@ class AbstractViews[T: type]:
     _id_field: str | None = None  # Primary key
     _geometry_field: str | None = None  # Geometry field
     _base_schema: type[T] | None = None  # base colander schema
+    _search_backend: ClassVar[SearchBackend] = ILikeSearch()  # See c2cgeoform.views.search
+    _list_load_only: ClassVar[bool] = True  # Only load the list fields columns in grid and geojson
+    _grid_keyset_pagination: ClassVar[bool] = False  # Let the grid page with cursors instead of offsets
+    # Format requested by the grid page, "compact" is ignored when _item_actions is overridden without
+    # describing its actions with _grid_item_action_names and _grid_action_templates
+    _grid_format: ClassVar[Literal["verbose", "compact"]] = "verbose"
+    _geojson_stream: ClassVar[bool] = False  # Stream the GeoJSON features, see geojson()
+    # Stream the features from their own session, after the request transaction, otherwise they are
+    # encoded in the request transaction, see _geojson_stream_response()
+    _geojson_stream_session: ClassVar[bool] = True
+    _geojson_stream_batch_size: ClassVar[int] = 1000  # Number of rows fetched at once when streaming
+    _geojson_db_encoding: ClassVar[bool] = False  # Encode the geometries with ST_AsGeoJSON in the database
+    # Round the coordinates of the features, to 9 digits by default when encoded in the database
+    _geojson_max_decimal_digits: ClassVar[int | None] = None
+    _geojson_quantization: ClassVar[int | None] = None  # Quantize the coordinates, see geojson()
+    _geojson_cluster_distance: ClassVar[int] = 40  # Size of the cluster cells, in pixels
+    _geojson_cluster_sample_size: ClassVar[int] = 10  # Number of feature ids returned by cluster
+    _map_cluster: ClassVar[bool] = False  # Let the map page show clusters of the features
+    _map_vector_tiles: ClassVar[bool] = False  # Let the map page load the features from tiles()
+    _tiles_extent: ClassVar[int] = 4096  # Size of the tiles in their integer coordinates
+    _tiles_buffer: ClassVar[int] = 64  # Margin around the tiles, in tile coordinates
+    _tiles_max_age: ClassVar[int] = 60  # HTTP cache lifetime of the tiles, in seconds
+    # Copy the deferred columns that are not loaded (e.g. FileData.data) in the database when duplicating
+    _duplicate_in_database: ClassVar[bool] = True
+    _grid_window_count: ClassVar[bool] = True  # Get the grid total in the statement of the rows
+    # How the grid total is computed: "exact", "cached" (exact with a TTL), "explain" (estimated from
+    # the query plan) or "reltuples" (estimated from the table statistics when there is no search)
+    _grid_total_strategy: ClassVar[Literal["exact", "cached", "explain", "reltuples"]] = "exact"
+    _grid_total_cache_ttl: ClassVar[float] = 60  # In seconds
+    _grid_total_estimate_threshold: ClassVar[int] = 10000  # Smaller estimates are replaced by exact counts
     MSG_COL: ClassVar[dict[str, UserMessage]] = {
         "submit_ok": UserMessage(_("Your submission has been taken into account."), "alert-success"),
         "copy_ok": UserMessage(_("Please check that the copy fits before submitting."), "alert-info"),
@@ -285,11 +531,16 @@ class AbstractViews[T: type]:
         self._schema: str | None = None
         self._appstruct: dict[str, Any] | None = None
         self._obj: T | None = None
+        self._json_serializer: Callable[[Any], str] | None = None
+        self._geojson_fragments: dict[str, colander_ext.GeoJSONFragment] = {}
 
     def index(self) -> IndexResponse[T]:
         return {
             "grid_actions": self._grid_actions(),
             "list_fields": self._list_fields,
+            "keyset_pagination": self._grid_keyset_pagination,
+            "grid_format": self._grid_format if self._grid_compact_supported() else "verbose",
+            "estimated_total_format": self._request.localizer.translate(_("about ${total}")),
         }
 
     def grid(self) -> GridResponse:
@@ -297,6 +548,13 @@ class AbstractViews[T: type]:
         Get the data for the grid view.
 
         API method which serves the JSON data for the Bootgrid table in the admin view.
+
+        With keyset pagination, the ``after`` or ``before`` parameters can be used in place of
+        ``offset`` with the ``next`` or ``previous`` cursors of a previous response.
+
+        With ``format=compact``, the rows only carry the names of their actions, the actions are given
+        once in ``action_templates`` with ``{id}`` in place of the item id. The parameter is ignored
+        when the view overrides ``_item_actions`` but not ``_grid_action_templates``.
         """
         try:
             params = self._request.params
@@ -305,16 +563,46 @@ class AbstractViews[T: type]:
             search = params.get("search", "").strip()
             sort = params.get("sort", "")
             order = params.get("order", "")
+            after = params.get("after") or None
+            before = params.get("before") or None
 
-            query = self._base_query()
+            query = self._eager_load_query(self._project_query(self._base_query()))
             query = self._filter_query(query, search)
-            query = self._sort_query(query, sort, order)
 
-            return {"rows": self._grid_rows(query, offset, limit), "total": query.count()}
+            if self._grid_keyset_pagination or after is not None or before is not None:
+                ranked_query, rank = self._search_rank(query, sort, search)
+                keys = [*self._sort_keys(sort, order, rank), *self._primary_key_sort_keys()]
+                rows, previous, next_ = self._grid_keyset_rows(
+                    ranked_query, keys, offset, limit, after, before
+                )
+                total, exact = self._grid_total(query)
+                response: GridResponse = {
+                    "rows": rows,
+                    "total": total,
+                    "total_exact": exact,
+                    "previous": previous,
+                    "next": next_,
+                }
+            else:
+                query = self._sort_query(query, sort, order, search)
+
+                if self._grid_total_strategy == "exact" and self._grid_window_count:
+                    rows, total = self._grid_rows_with_total(query, offset, limit)
+                    response = {"rows": rows, "total": total, "total_exact": True}
+                else:
+                    rows = self._grid_rows(query, offset, limit)
+                    total, exact = self._grid_total(query)
+                    response = {"rows": rows, "total": total, "total_exact": exact}
+
         except DBAPIError as exception:
             _LOGGER.exception("DBAPIError")
             raise HTTPInternalServerError(_DB_ERR_MSG) from exception
 
+        if self._grid_compact():
+            response["action_templates"] = self._grid_action_templates()
+            response["dblclick_template"] = self._id_url_template("c2cgeoform_item")
+        return response
+
     def map(self, map_settings: JSONDict | None = None) -> MapResponse:
         map_settings = map_settings or {}
         map_options = {
@@ -327,6 +615,16 @@ class AbstractViews[T: type]:
             ),
             **map_settings,
         }
+        if self._map_cluster:
+            # The clusters are loaded by extent, for the resolution of the view
+            map_options["cluster"] = True
+            map_options["bboxStrategy"] = True
+        if self._map_vector_tiles:
+            map_options["tilesUrl"] = (
+                self._request.route_url("c2cgeoform_tiles", z="{z}", x="{x}", y="{y}")
+                .replace("%7B", "{")
+                .replace("%7D", "}")
+            )
         return {
             "map_options": {
                 key: (self._request.translate(value) if isinstance(value, TranslationString) else value)
@@ -334,96 +632,713 @@ class AbstractViews[T: type]:
             },
         }
 
-    def geojson(self) -> geojson.FeatureCollection:
+    def geojson(self) -> geojson.FeatureCollection | pyramid.response.Response:
+        """
+        Get the features for the map view.
+
+        With ``_geojson_stream`` or the ``format=ndjson`` parameter, the features are read by batches from
+        a server-side cursor, see ``_geojson_stream_response``.
+
+        With ``_geojson_db_encoding``, the geometries are encoded in GeoJSON by the database and spliced
+        in the response as is.
+
+        With the ``cluster`` parameter, the features are grouped in clusters, see ``_geojson_clusters``.
+
+        With ``_geojson_quantization`` or the ``quantize`` parameter, the coordinates are quantized, see
+        ``_geojson_quantized``.
+        """
+        if self._request.params.get("cluster"):
+            return self._geojson_clusters()
+
+        if self._geojson_stream or self._request.params.get("format") == "ndjson":
+            return self._geojson_stream_response()
+
+        if self._geojson_db_encoding:
+            features = (self._geojson_feature_json(entities) for entities in self._geojson_query())
+            return pyramid.response.Response(
+                body=b"".join(_stream_features(features)),
+                content_type="application/json",
+                charset="utf-8",
+            )
+
+        try:
+            quantization = int(self._request.params.get("quantize", self._geojson_quantization or 0))
+        except ValueError as exception:
+            raise HTTPBadRequest(str(exception)) from exception
+        if quantization:
+            return self._geojson_quantized(quantization)
+
+        features: list[geojson.Feature] = [
+            self._geojson_feature(entities[0], entities[-1]) for entities in self._geojson_query()
+        ]
+        return FeatureCollection(features)
+
+    def _geojson_quantized(self, quantization: int) -> FeatureCollection:
+        """
+        Get the features with their coordinates encoded as integers, like TopoJSON.
+
+        The coordinates are divided in ``quantization`` values in each dimension of the extent of the
+        features, and decoded with the ``transform`` member of the collection, see
+        ``c2cgeoform.ext.shapely_ext.quantize``.
+        """
+        assert self._id_field is not None
+        if quantization < 2:
+            raise HTTPBadRequest(_INVALID_QUANTIZATION_MSG)
+
+        rows = self._geojson_query().all()
+        transform, geometries = quantize(
+            [to_shape(entities[-1]) if entities[-1] is not None else None for entities in rows],
+            quantization,
+        )
+        features = [
+            Feature(
+                id=getattr(entities[0], self._id_field),
+                geometry=geometry,
+                properties={f.id(): f.value(entities[0]) for f in self._list_fields},
+            )
+            for entities, geometry in zip(rows, geometries, strict=True)
+        ]
+        return FeatureCollection(features, transform=transform)
+
+    def _geojson_query(self) -> sqlalchemy.orm.query.Query[Any]:
+        """
+        Get the query of the features, with the geometry in the last column.
+
+        The features can be filtered with a ``bbox`` (``minx,miny,maxx,maxy`` in the ``bbox-srid``
+        projection, default to ``srid``). With a ``resolution`` (in ``srid`` units per pixel) or a
+        ``zoom`` (of the Web Mercator tile grid), the geometries are simplified with this tolerance.
+        """
+        assert self._geometry_field is not None
+
+        srid, bbox, bbox_srid, resolution = self._geojson_params()
+        column = getattr(self._model, self._geometry_field)
+        geometry = column.ST_Transform(srid)
+        if resolution:
+            geometry = func.ST_SimplifyPreserveTopology(geometry, resolution)
+        if self._geojson_db_encoding:
+            digits = self._geojson_max_decimal_digits
+            geometry = func.ST_AsGeoJSON(geometry, 9 if digits is None else digits)
+        query = self._eager_load_query(self._project_query(self._base_query())).add_column(
+            geometry.label("_geometry"),
+        )
+        return self._bbox_filter(query, bbox, bbox_srid)
+
+    def _geojson_params(self) -> tuple[int, list[float] | None, int, float | None]:
+        """Get the ``srid``, ``bbox``, ``bbox-srid`` and resolution parameters of ``geojson``."""
+        params = self._request.params
+        try:
+            srid = int(params.get("srid", 3857))
+            bbox = [float(value) for value in params["bbox"].split(",")] if params.get("bbox") else None
+            bbox_srid = int(params.get("bbox-srid", srid))
+            if params.get("resolution"):
+                resolution: float | None = float(params["resolution"])
+            elif params.get("zoom"):
+                resolution = _WEB_MERCATOR_RESOLUTION / 2 ** float(params["zoom"])
+            else:
+                resolution = None
+        except ValueError as exception:
+            raise HTTPBadRequest(str(exception)) from exception
+        if bbox is not None and len(bbox) != 4:
+            raise HTTPBadRequest(_INVALID_BBOX_MSG)
+        return srid, bbox, bbox_srid, resolution
+
+    def _bbox_filter(
+        self,
+        query: sqlalchemy.orm.query.Query[Any],
+        bbox: list[float] | None,
+        bbox_srid: int,
+    ) -> sqlalchemy.orm.query.Query[Any]:
+        """Only keep the features whose bounding box intersects ``bbox``."""
+        if bbox is None:
+            return query
+        assert self._geometry_field is not None
+        column = getattr(self._model, self._geometry_field)
+        envelope = func.ST_MakeEnvelope(*bbox, bbox_srid)
+        column_srid = getattr(column.type, "srid", -1)
+        if column_srid > 0 and column_srid != bbox_srid:
+            envelope = func.ST_Transform(envelope, column_srid)
+        # Bounding box intersection, served by the GiST index of the column
+        return query.filter(column.op("&&")(envelope))
+
+    def _geojson_clusters(self) -> FeatureCollection:
+        """
+        Get the features grouped by cells of ``_geojson_cluster_distance`` pixels.
+
+        Each cluster is a point feature at the centroid of its features, marked by ``c2cgeoform_cluster``,
+        with their ``count``, the ``extent`` of their centroids and the ``ids`` of up to
+        ``_geojson_cluster_sample_size`` of them. The clusters of a single feature have its id.
+        """
+        features = [
+            Feature(
+                id=ids[0] if count == 1 else None,
+                geometry=to_shape(centroid),
+                properties={
+                    "c2cgeoform_cluster": True,
+                    "count": count,
+                    "ids": ids,
+                    "extent": [minx, miny, maxx, maxy],
+                },
+            )
+            for count, centroid, ids, minx, miny, maxx, maxy in self._geojson_cluster_query()
+        ]
+        return FeatureCollection(features)
+
+    def _geojson_cluster_query(self) -> sqlalchemy.orm.query.Query[Any]:
+        """Get the query of the clusters, grouped with ``ST_SnapToGrid`` on the centroids."""
         assert self._geometry_field is not None
         assert self._id_field is not None
 
-        srid = int(self._request.params.get("srid", 3857))
+        srid, bbox, bbox_srid, resolution = self._geojson_params()
+        if resolution is None:
+            raise HTTPBadRequest(_CLUSTER_RESOLUTION_MSG)
+        column = getattr(self._model, self._geometry_field)
+        point = func.ST_Centroid(column.ST_Transform(srid))
+        identifier = getattr(self._model, self._id_field)
+        features = self._bbox_filter(
+            self._base_query().with_entities(identifier).filter(column.is_not(None)),
+            bbox,
+            bbox_srid,
+        )
+        # The joins of the base query may repeat the features, aggregate each of them once
+        return (
+            self._request.dbsession.query(self._model)
+            .with_entities(
+                func.count(),
+                func.ST_Centroid(func.ST_Collect(point)),
+                func.array_agg(aggregate_order_by(identifier, identifier))[
+                    1 : self._geojson_cluster_sample_size
+                ],
+                func.min(func.ST_X(point)),
+                func.min(func.ST_Y(point)),
+                func.max(func.ST_X(point)),
+                func.max(func.ST_Y(point)),
+            )
+            .filter(identifier.in_(features.statement))
+            .group_by(func.ST_SnapToGrid(point, resolution * self._geojson_cluster_distance))
+        )
+
+    def _geojson_feature(self, entity: T, geometry: WKBElement | None) -> Feature:
+        assert self._id_field is not None
+
+        return Feature(
+            id=getattr(entity, self._id_field),
+            geometry=self._geojson_shape(geometry),
+            properties={f.id(): f.value(entity) for f in self._list_fields},
+        )
+
+    def _geojson_shape(self, geometry: WKBElement | None) -> BaseGeometry | None:
+        """Get the shapely geometry of a feature, rounded with ``_geojson_max_decimal_digits``."""
+        if geometry is None:
+            return None
+        shape = to_shape(geometry)
+        if self._geojson_max_decimal_digits is not None:
+            shape = round_coordinates(shape, self._geojson_max_decimal_digits)
+        return shape
+
+    def _geojson_feature_json(self, entities: Any) -> str:
+        """Get a feature of a ``_geojson_query`` row encoded in GeoJSON."""
+        assert self._id_field is not None
+
+        entity, geometry = entities[0], entities[-1]
+        if not self._geojson_db_encoding:
+            shape = self._geojson_shape(geometry)
+            geometry = to_geojson(shape) if shape is not None else None
+
+        properties = {f.id(): f.value(entity) for f in self._list_fields}
+        # The geometry is already encoded, splice it without parsing it
+        return (
+            f'{{"type": "Feature", "id": {self._json_dumps(getattr(entity, self._id_field))}, '
+            f'"geometry": {geometry or "null"}, "properties": {self._json_dumps(properties)}}}'
+        )
 
-        query = self._base_query().add_column(
-            getattr(self._model, self._geometry_field).ST_Transform(srid).label("_geometry"),
+    def _json_dumps(self, value: Any) -> str:
+        """Serialize a value like the ``c2cgeoform_json`` renderer (dates, decimals, …)."""
+        if self._json_serializer is None:
+            self._json_serializer = json_serializer(self._request)
+        return self._json_serializer(value)
+
+    def _geojson_stream_response(self) -> pyramid.response.Response:
+        """
+        Get a response streaming the features, as a FeatureCollection or as newline-delimited GeoJSON.
+
+        The features are read by batches of ``_geojson_stream_batch_size`` from a server-side cursor, so
+        only the entities of one batch are in memory. With ``_geojson_stream_session`` (the default), they
+        are read from a session of their own while the response is written, so the memory use does not
+        depend on the number of features, but outside the request transaction. Otherwise, they are
+        encoded in the request transaction, and the encoded response is kept in memory.
+        """
+        ndjson = self._request.params.get("format") == "ndjson"
+        query = self._geojson_query()
+        if self._geojson_stream_session:
+            app_iter: Iterable[bytes] = self._geojson_stream_iter(query, ndjson)
+        else:
+            features = (
+                self._geojson_feature_json(entities)
+                for entities in query.yield_per(self._geojson_stream_batch_size)
+            )
+            app_iter = list(_stream_features(features, ndjson))
+        return pyramid.response.Response(
+            app_iter=app_iter,
+            content_type="application/x-ndjson" if ndjson else "application/json",
+            charset="utf-8",
+        )
+
+    def _geojson_stream_iter(self, query: sqlalchemy.orm.query.Query[Any], ndjson: bool) -> Iterator[bytes]:
+        # The response is written after the end of the request transaction, so it needs its own session,
+        # which does not see the changes of the request, nor its transaction settings (SET LOCAL, ...)
+        session = sqlalchemy.orm.Session(bind=self._request.dbsession.get_bind())
+        try:
+            features = (
+                self._geojson_feature_json(entities)
+                for entities in query.with_session(session).yield_per(self._geojson_stream_batch_size)
+            )
+            yield from _stream_features(features, ndjson)
+        finally:
+            session.close()
+
+    def tiles(self) -> pyramid.response.Response:
+        """
+        Get a Mapbox Vector Tile of the features, for the ``z``, ``x`` and ``y`` of the Web Mercator grid.
+
+        The tiles can be cached by HTTP caches for ``_tiles_max_age`` seconds.
+        """
+        try:
+            z, x, y = (int(self._request.matchdict[key]) for key in ("z", "x", "y"))
+        except ValueError as exception:
+            raise HTTPBadRequest(_INVALID_TILE_MSG) from exception
+        if not (0 <= z <= 30 and 0 <= x < 2**z and 0 <= y < 2**z):
+            raise HTTPNotFound(_INVALID_TILE_MSG)
+
+        tile = self._request.dbsession.execute(self._tile_query(z, x, y)).scalar()
+        response = pyramid.response.Response(
+            body=bytes(tile or b""),
+            content_type="application/vnd.mapbox-vector-tile",
+            conditional_response=True,
         )
+        response.md5_etag()
+        response.cache_control.public = True
+        response.cache_control.max_age = self._tiles_max_age
+        return response
+
+    def _tile_query(self, z: int, x: int, y: int) -> sqlalchemy.sql.expression.Select[Any]:
+        """
+        Get the query of a tile, with ``ST_AsMVT`` and ``ST_AsMVTGeom``.
+
+        The layer is named as the table of the model and the feature properties are the id (``_id_``) and
+        the list fields whose value is a column, see ``ListField.column``.
+        """
+        assert self._geometry_field is not None
+        assert self._id_field is not None
 
-        features: list[geojson.Feature] = []
-        for entities in query:
-            entity = entities[0]
-            geometry = entities[-1]
-            features.append(
-                Feature(
-                    id=getattr(entity, self._id_field),
-                    geometry=to_shape(geometry) if geometry is not None else None,
-                    properties={f.id(): f.value(entity) for f in self._list_fields},
+        column = getattr(self._model, self._geometry_field)
+        envelope = func.ST_TileEnvelope(z, x, y)
+        # Also get the features of the buffer, so the geometries are not cut at the tile edges
+        bounds = func.ST_Expand(envelope, _WEB_MERCATOR_SIZE / 2**z * self._tiles_buffer / self._tiles_extent)
+        column_srid = getattr(column.type, "srid", -1)
+        if column_srid > 0 and column_srid != 3857:
+            bounds = func.ST_Transform(bounds, column_srid)
+        properties = [
+            field.column().label(field.id())  # type: ignore[union-attr]
+            for field in self._list_fields
+            if field.column() is not None and field.id() not in ("_id_", "geometry")
+        ]
+        features = (
+            self._base_query()
+            .with_entities(
+                getattr(self._model, self._id_field).label("_id_"),
+                *properties,
+                func.ST_AsMVTGeom(
+                    column.ST_Transform(3857), envelope, self._tiles_extent, self._tiles_buffer, true()
+                ).label("geometry"),
+            )
+            .filter(column.op("&&")(bounds))
+            .subquery()
+        )
+        mapper = inspect(self._model)
+        return (
+            select(
+                func.ST_AsMVT(
+                    features.table_valued(),
+                    literal(mapper.local_table.name, types.String),
+                    self._tiles_extent,
+                    literal("geometry", types.String),
                 ),
             )
-        return FeatureCollection(features)
+            .select_from(features)
+            .where(features.c.geometry.is_not(None))
+        )
 
     def _base_query(self) -> sqlalchemy.orm.query.Query[T]:
         return cast("sqlalchemy.orm.query.Query[T]", self._request.dbsession.query(self._model))
 
+    def _project_query(self, query: sqlalchemy.orm.query.Query[T]) -> sqlalchemy.orm.query.Query[T]:
+        """
+        Only load the columns needed by the list fields, see ``_list_load_only``.
+
+        When a list field does not declare its dependencies, the geometry columns are the only ones not
+        loaded.
+        """
+        if not self._list_load_only:
+            return query
+        mapper = inspect(self._model)
+        assert isinstance(mapper, sqlalchemy.orm.Mapper)
+        attributes = self._list_dependencies(mapper)
+        if attributes is not None:
+            return query.options(load_only(*attributes))
+
+        declared = {dep.key for field in self._list_fields for dep in field.dependencies() or []}
+        return query.options(
+            *[
+                defer(getattr(mapper.class_, prop.key))
+                for prop in mapper.column_attrs
+                if prop.key not in declared
+                and any(isinstance(column.type, Geometry | Geography) for column in prop.columns)
+            ],
+        )
+
+    def _eager_load_query(self, query: sqlalchemy.orm.query.Query[T]) -> sqlalchemy.orm.query.Query[T]:
+        """
+        Eagerly load the relationships traversed by the list fields.
+
+        Collections are loaded with ``selectinload``, many-to-one relationships with ``joinedload``.
+        """
+        mapper = inspect(self._model)
+        paths = {
+            tuple(attribute.property for attribute in path): path
+            for field in self._list_fields
+            for path in field.relationships()
+            if isinstance(path[0].parent, sqlalchemy.orm.Mapper) and mapper.isa(path[0].parent)  # type: ignore[union-attr]
+        }
+        options = []
+        for path in paths.values():
+            loader: Any = None
+            for attribute in path:
+                if attribute.property.uselist:
+                    loader = selectinload(attribute) if loader is None else loader.selectinload(attribute)
+                else:
+                    loader = joinedload(attribute) if loader is None else loader.joinedload(attribute)
+            options.append(loader)
+        return query.options(*options) if options else query
+
+    def _list_dependencies(
+        self,
+        mapper: sqlalchemy.orm.Mapper[Any],
+    ) -> list[sqlalchemy.orm.attributes.InstrumentedAttribute[Any]] | None:
+        """Get the model column attributes needed by the list fields, ``None`` when unknown."""
+        assert self._id_field is not None
+        columns = [*mapper.primary_key]
+        dependencies = [getattr(mapper.class_, self._id_field)]
+        for field in self._list_fields:
+            field_dependencies = field.dependencies()
+            if field_dependencies is None:
+                return None
+            dependencies += field_dependencies
+
+        attributes: dict[str, sqlalchemy.orm.attributes.InstrumentedAttribute[Any]] = {}
+        for dependency in dependencies:
+            if not isinstance(dependency.parent, sqlalchemy.orm.Mapper) or not mapper.isa(dependency.parent):
+                continue  # Attribute of another entity
+            if isinstance(dependency.property, RelationshipProperty):
+                # The foreign keys are needed to load the related objects
+                columns += dependency.property.local_columns
+            else:
+                attributes[dependency.key] = dependency
+        for column in columns:
+            prop = mapper.get_property_by_column(column)
+            attributes[prop.key] = getattr(mapper.class_, prop.key)
+        return list(attributes.values())
+
     def _filter_query(
         self,
         query: sqlalchemy.orm.query.Query[T],
         search_phrase: str,
     ) -> sqlalchemy.orm.query.Query[T]:
         if search_phrase != "":
-            search_expr = "%" + "%".join(search_phrase.split()) + "%"
+            fields = [field for field in self._list_fields if field.filtrable()]
+            if len(fields) > 0:
+                query = query.filter(self._search_backend.filter(fields, search_phrase))
 
-            # create `ilike` filters for every list text field
-            filters = [
-                field.filter_expression(search_expr) for field in self._list_fields if field.filtrable()
-            ]
+        return query
 
-            # then join the filters into one `or` condition
-            if len(filters) > 0:
-                query = query.filter(or_(*filters))
+    def _missing_search_indexes(self) -> list[str]:
+        """Get the filter columns without an index supporting the search backend."""
+        return self._search_backend.missing_indexes(
+            self._request.dbsession,
+            [field for field in self._list_fields if field.filtrable()],
+        )
 
-        return query
+    def _search_rank(
+        self,
+        query: sqlalchemy.orm.query.Query[T],
+        sort: str,
+        search: str,
+    ) -> tuple[sqlalchemy.orm.query.Query[T], sqlalchemy.sql.expression.ColumnElement[Any] | None]:
+        """
+        Get the relevance of the rows for the search phrase, used when no sort column is selected.
+
+        When the filter columns are on joined tables, the best rank of the joined rows is computed in a
+        subquery grouped by the primary key, joined to the query, so there is one rank per entity. With
+        ``DISTINCT``, the rank is added to the selected columns, as the ``ORDER BY`` expressions must be.
+        """
+        if search == "" or any(field.id() == sort for field in self._list_fields):
+            return query, None
+        fields = [field for field in self._list_fields if field.filtrable()]
+        rank = self._search_backend.rank(fields, search) if fields else None
+        if rank is None:
+            return query, None
+        mapper = inspect(self._model)
+        if not set(find_tables(rank, check_columns=True)) <= set(mapper.tables):
+            primary_key = mapper.primary_key
+            ranks = (
+                self._filter_query(self._base_query(), search)
+                .with_entities(
+                    *[column.label(f"_pk_{index}") for index, column in enumerate(primary_key)],
+                    func.max(rank).label("rank"),
+                )
+                .order_by(None)
+                .group_by(*primary_key)
+                .subquery("c2cgeoform_rank")
+            )
+            query = query.join(
+                ranks,
+                and_(*[column == ranks.c[f"_pk_{index}"] for index, column in enumerate(primary_key)]),
+            )
+            rank = ranks.c.rank
+        if query._distinct:  # noqa: SLF001
+            query = query.add_columns(rank)
+        return query, rank
+
+    def _sort_keys(
+        self,
+        sort: str,
+        order: str,
+        rank: sqlalchemy.sql.expression.ColumnElement[Any] | None = None,
+    ) -> list[SortKey]:
+        keys = [(field.sort_column(), order == "desc") for field in self._list_fields if field.id() == sort]
+        if not keys and rank is not None:
+            # Most relevant first, see _search_rank
+            keys.append((rank, True))
+        # default order by
+        keys += [_sort_key(order_field) for order_field in self._list_ordered_fields]
+        return keys
+
+    def _primary_key_sort_keys(self) -> list[SortKey]:
+        primary_key = inspect(self._model).primary_key  # type: ignore[union-attr]
+        return [(pkey_column, False) for pkey_column in primary_key]
 
     def _sort_query(
         self,
         query: sqlalchemy.orm.query.Query[T],
         sort: str,
         order: str,
+        search: str = "",
     ) -> sqlalchemy.orm.query.Query[T]:
-        for field in self._list_fields:
-            if field.id() == sort:
-                if order == "desc":
-                    query = query.order_by(desc(field.sort_column()))
-                else:
-                    query = query.order_by(field.sort_column())
-        # default order by
-        for order_field in self._list_ordered_fields:
-            query = query.order_by(order_field)
+        query, rank = self._search_rank(query, sort, search)
+        for column, descending in self._sort_keys(sort, order, rank):
+            query = query.order_by(desc(column) if descending else column)
         return query
 
     def _grid_rows(self, query: sqlalchemy.orm.query.Query[T], offset: int, limit: int) -> JSONList:
         # Sort on primary key as subqueryload with limit need deterministic order
-        for pkey_column in inspect(self._model).primary_key:  # type: ignore[union-attr]
+        for pkey_column, _descending in self._primary_key_sort_keys():
             query = query.order_by(pkey_column)
 
         if limit != -1:
             query = query.limit(limit).offset(offset)
-        rows: JSONList = []
 
-        for entities in query:
-            # For some reason like:
-            # https://docs.sqlalchemy.org/en/14/changelog/migration_20.html#using-distinct-with-additional-columns-but-only-select-the-entity
-            # we are required to add a second field to the query, in this case we should get only the first one
-            entity: T = (
+        return [self._grid_row(self._row_entity(entities)) for entities in query]
+
+    def _grid_total(self, query: sqlalchemy.orm.query.Query[T]) -> tuple[int, bool]:
+        """Get the total number of grid records and whether it is exact, see ``_grid_total_strategy``."""
+        if self._grid_total_strategy == "cached":
+            compiled = query.statement.compile(dialect=self._request.dbsession.get_bind().dialect)
+            key = (type(self), str(compiled), repr(sorted(compiled.params.items())))
+            total = _TOTAL_CACHE.get(key)
+            if total is None:
+                total = query.count()
+                _TOTAL_CACHE.set(key, total, ttl=self._grid_total_cache_ttl)
+            return total, True
+
+        if self._grid_total_strategy in ("explain", "reltuples"):
+            estimate = None
+            if self._grid_total_strategy == "reltuples" and self._whole_table_query(query):
+                estimate = self._reltuples_estimate()
+            if estimate is None:
+                estimate = self._explain_estimate(query)
+            # Estimates are unreliable on small tables, where counting is cheap anyway
+            if estimate >= self._grid_total_estimate_threshold:
+                return estimate, False
+
+        return query.count(), True
+
+    def _whole_table_query(self, query: sqlalchemy.orm.query.Query[T]) -> bool:
+        """
+        Check if the query returns all the rows of the model table, so its statistics apply.
+
+        The conditions and the joins of the search or of ``_base_query`` (e.g. permissions filters or
+        joined rows) change the number of rows.
+        """
+        return not (
+            query.whereclause is not None
+            or query._setup_joins  # noqa: SLF001
+            or query._from_obj  # noqa: SLF001
+            or query._group_by_clauses  # noqa: SLF001
+            or query._limit_clause is not None  # noqa: SLF001
+            or query._offset_clause is not None  # noqa: SLF001
+            # The single table inheritance criteria are added on compilation
+            or inspect(self._model).single
+        )
+
+    def _reltuples_estimate(self) -> int | None:
+        """Get the number of rows of the model table from the PostgreSQL statistics."""
+        dbsession = self._request.dbsession
+        table = inspect(self._model).local_table  # type: ignore[union-attr]
+        name = dbsession.get_bind().dialect.identifier_preparer.format_table(table)
+        reltuples = dbsession.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": name},
+        ).scalar()
+        # -1 means that the table has never been analyzed
+        return None if reltuples is None or reltuples < 0 else int(reltuples)
+
+    def _explain_estimate(self, query: sqlalchemy.orm.query.Query[T]) -> int:
+        """Get the number of rows of the query estimated by the PostgreSQL planner."""
+        plan = self._request.dbsession.execute(_Explain(query.order_by(None).statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _window_count_safe(self, query: sqlalchemy.orm.query.Query[T]) -> bool:
+        """
+        Check if ``COUNT(*) OVER ()`` on the query gives the same total as ``query.count()``.
+
+        Window functions are evaluated before ``DISTINCT``, so they would count duplicated rows.
+        """
+        return not (
+            query._distinct  # noqa: SLF001
+            or query._distinct_on  # noqa: SLF001
+            or query._group_by_clauses  # noqa: SLF001
+            or query._limit_clause is not None  # noqa: SLF001
+            or query._offset_clause is not None  # noqa: SLF001
+        )
+
+    def _total_column(
+        self, query: sqlalchemy.orm.query.Query[T]
+    ) -> sqlalchemy.sql.expression.ColumnElement[Any]:
+        """
+        Get a column giving the total number of rows of the query, to add to its own statement.
+
+        When ``COUNT(*) OVER ()`` is not safe, e.g. with ``DISTINCT``, the rows of the query are counted in
+        a subquery, that PostgreSQL evaluates once for the statement.
+        """
+        if self._window_count_safe(query):
+            return func.count().over()
+        if query._limit_clause is None and query._offset_clause is None:  # noqa: SLF001
+            query = query.order_by(None)
+        return select(func.count()).select_from(query.subquery()).scalar_subquery()
+
+    def _grid_rows_with_total(
+        self,
+        query: sqlalchemy.orm.query.Query[T],
+        offset: int,
+        limit: int,
+    ) -> tuple[JSONList, int]:
+        """Get the grid rows and the total in a single statement, see ``_total_column``."""
+        paged_query = query.add_columns(self._total_column(query).label("_total"))
+        # Sort on primary key as subqueryload with limit need deterministic order
+        for pkey_column, _descending in self._primary_key_sort_keys():
+            paged_query = paged_query.order_by(pkey_column)
+        if limit != -1:
+            paged_query = paged_query.limit(limit).offset(offset)
+
+        results = paged_query.all()
+        # Past the last page, there is no row to carry the total
+        total = int(results[0][-1]) if results else query.count() if offset else 0
+        return [self._grid_row(result[0]) for result in results], total
+
+    def _grid_keyset_rows(
+        self,
+        query: sqlalchemy.orm.query.Query[T],
+        keys: list[SortKey],
+        offset: int,
+        limit: int,
+        after: str | None = None,
+        before: str | None = None,
+    ) -> tuple[JSONList, str | None, str | None]:
+        """
+        Get a page of grid rows using keyset (seek) pagination.
+
+        ``keys`` must end with the primary key to give a total order. Pages are selected with a
+        ``WHERE`` condition on the sort keys of the ``after`` (or ``before``) cursor instead of an
+        ``OFFSET``, so deep pages cost the same as the first one. ``offset`` is only used when no cursor
+        is given.
+
+        Returns the rows with the cursors of the first and last ones.
+        """
+        backward = before is not None
+        cursor = before if backward else after
+        if cursor is not None:
+            values = _decode_cursor(cursor)
+            if len(values) != len(keys):
+                raise HTTPBadRequest(_INVALID_CURSOR_MSG)
+            # Going backward is going forward on the reversed order
+            query = query.filter(_keyset_filter([(c, d != backward) for c, d in keys], values))
+
+        for column, descending in keys:
+            query = query.order_by(desc(column) if descending != backward else column)
+        query = query.add_columns(
+            *[column.label(f"_keyset_{index}") for index, (column, _descending) in enumerate(keys)],
+        )
+        if cursor is None and offset:
+            query = query.offset(offset)
+        if limit != -1:
+            query = query.limit(limit)
+
+        results = query.all()
+        if backward:
+            results.reverse()
+        cursors = [_encode_cursor(list(result[-len(keys) :])) for result in results]
+        rows: JSONList = [self._grid_row(result[0]) for result in results]
+        return rows, (cursors[0] if cursors else None), (cursors[-1] if cursors else None)
+
+    def _row_entity(self, entities: Any) -> T:
+        # For some reason like:
+        # https://docs.sqlalchemy.org/en/14/changelog/migration_20.html#using-distinct-with-additional-columns-but-only-select-the-entity
+        # we are required to add a second field to the query, in this case we should get only the first one
+        return cast(
+            "T",
+            (
                 cast("sqlalchemy.engine.row.Row[tuple[T, Any]]", entities)[0]
                 if isinstance(entities, sqlalchemy.engine.row.Row)
                 else entities
-            )
-            row = cast(
-                "JSONDict",
-                {
-                    f.id(): f.value(entity)
-                    for f in ([*self._list_fields, ListField(self._model, self._id_field, key="_id_")])
-                },
-            )
-            row["actions"] = self._grid_item_actions(entity)
-            rows.append(row)
-        return rows
+            ),
+        )
+
+    def _grid_row(self, entity: T) -> JSONDict:
+        row = cast(
+            "JSONDict",
+            {
+                f.id(): f.value(entity)
+                for f in ([*self._list_fields, ListField(self._model, self._id_field, key="_id_")])
+            },
+        )
+        row["actions"] = (
+            cast("JSON", self._grid_item_action_names(entity))
+            if self._grid_compact()
+            else self._grid_item_actions(entity)
+        )
+        return row
+
+    def _grid_compact(self) -> bool:
+        return self._request.params.get("format") == "compact" and self._grid_compact_supported()
+
+    def _grid_compact_supported(self) -> bool:
+        """Check that the actions of ``_item_actions`` are also given by the compact format methods."""
+        view_class = type(self)
+        return (
+            view_class._item_actions is AbstractViews._item_actions  # noqa: SLF001
+            or view_class._grid_action_templates is not AbstractViews._grid_action_templates  # noqa: SLF001
+        )
 
     def _form(self, schema: type[T] | None = None, **kwargs: Any) -> Form:
         schema = schema or self._base_schema
@@ -450,15 +1365,34 @@ class AbstractViews[T: type]:
             assert self._model is not None
             return cast("T", self._model())  # type: ignore[call-overload] # pylint: disable=not-callable
         primary_key = self._request.matchdict.get("id")
-        obj = (
-            self._request.dbsession.query(self._model)
+        expressions = self._geojson_fragment_expressions()
+        result = (
+            self._request.dbsession.query(self._model, *expressions.values())
             .filter(getattr(self._model, self._id_field) == primary_key)
             .one_or_none()
         )
-        if obj is None:
+        if result is None:
             raise HTTPNotFound
+        if not expressions:
+            return cast("T", result)
+        obj, *fragments = result
+        self._geojson_fragments = {
+            name: colander_ext.GeoJSONFragment(fragment)
+            for name, fragment in zip(expressions, fragments, strict=True)
+            if fragment is not None
+        }
         return cast("T", obj)
 
+    def _geojson_fragment_expressions(self) -> dict[str, Any]:
+        """Get the GeoJSON encoding expressions of the ``db_encoding`` geometries of the base schema."""
+        if self._base_schema is None:
+            return {}
+        return {
+            node.name: node.typ.geojson_expression(getattr(self._model, node.name)).label(node.name)
+            for node in self._base_schema.children  # type: ignore[attr-defined]
+            if isinstance(node.typ, colander_ext.Geometry) and node.typ.db_encoding
+        }
+
     def _model_config(self) -> JSONDict:
         return getattr(inspect(self._model).class_, "__c2cgeoform_config__", {})  # type: ignore[union-attr]
 
@@ -478,18 +1412,56 @@ class AbstractViews[T: type]:
         actions = self._item_actions(item)
         actions.insert(
             0,
-            ItemAction(
-                name="edit",
-                label=_("Edit"),
-                icon="glyphicon glyphicon-pencil",
-                url=self._request.route_url("c2cgeoform_item", id=getattr(item, self._id_field)),
-            ),
+            self._edit_action(self._request.route_url("c2cgeoform_item", id=getattr(item, self._id_field))),
         )
         return {
             "dropdown": [action.to_dict(self._request) for action in actions],
             "dblclick": self._request.route_url("c2cgeoform_item", id=getattr(item, self._id_field)),
         }
 
+    def _grid_item_action_names(self, item: T) -> list[str]:
+        """Get the names of the actions of a row in the compact grid format."""
+        names = ["edit"]
+        if inspect(item).persistent:  # type: ignore[union-attr]
+            if self._model_config().get("duplicate", False):
+                names.append("duplicate")
+            names.append("delete")
+        return names
+
+    def _grid_action_templates(self) -> dict[str, JSONDict]:
+        """Get the item actions of the compact grid format, with ``{id}`` in place of the item id."""
+        actions = [
+            self._edit_action(self._id_url_template("c2cgeoform_item")),
+            self._duplicate_action(self._id_url_template("c2cgeoform_item_duplicate")),
+            self._delete_action(self._id_url_template("c2cgeoform_item")),
+        ]
+        return {action.name(): action.to_dict(self._request) for action in actions}
+
+    def _id_url_template(self, route_name: str) -> str:
+        url: str = self._request.route_url(route_name, id="{id}")
+        return url.replace("%7Bid%7D", "{id}")
+
+    def _edit_action(self, url: str) -> ItemAction:
+        return ItemAction(name="edit", label=_("Edit"), icon="glyphicon glyphicon-pencil", url=url)
+
+    def _duplicate_action(self, url: str) -> ItemAction:
+        return ItemAction(
+            name="duplicate",
+            label=_("Duplicate"),
+            icon="glyphicon glyphicon-duplicate",
+            url=url,
+        )
+
+    def _delete_action(self, url: str) -> ItemAction:
+        return ItemAction(
+            name="delete",
+            label=_("Delete"),
+            icon="glyphicon glyphicon-remove",
+            url=url,
+            method="DELETE",
+            confirmation=_("Are your sure you want to delete this record ?"),
+        )
+
     def _item_actions(self, item: T, readonly: bool = False) -> list[ItemAction]:
         assert self._id_field is not None
 
@@ -499,26 +1471,15 @@ class AbstractViews[T: type]:
         assert isinstance(inspected_item, sqlalchemy.orm.InstanceState)
         if inspected_item.persistent and self._model_config().get("duplicate", False):
             actions.append(
-                ItemAction(
-                    name="duplicate",
-                    label=_("Duplicate"),
-                    icon="glyphicon glyphicon-duplicate",
-                    url=self._request.route_url(
-                        "c2cgeoform_item_duplicate",
-                        id=getattr(item, self._id_field),
-                    ),
+                self._duplicate_action(
+                    self._request.route_url("c2cgeoform_item_duplicate", id=getattr(item, self._id_field)),
                 ),
             )
 
         if inspected_item.persistent and not readonly:
             actions.append(
-                ItemAction(
-                    name="delete",
-                    label=_("Delete"),
-                    icon="glyphicon glyphicon-remove",
-                    url=self._request.route_url("c2cgeoform_item", id=getattr(item, self._id_field)),
-                    method="DELETE",
-                    confirmation=_("Are your sure you want to delete this record ?"),
+                self._delete_action(
+                    self._request.route_url("c2cgeoform_item", id=getattr(item, self._id_field)),
                 ),
             )
 
@@ -529,6 +1490,8 @@ class AbstractViews[T: type]:
         form = self._form(schema=schema, readonly=readonly)
         self._populate_widgets(form.schema)
         dict_ = form.schema.dictify(obj)
+        # The geometries loaded already encoded by the database
+        dict_.update({name: value for name, value in self._geojson_fragments.items() if name in dict_})
         if self._is_new():
             dict_.update(self._request.GET)
         kwargs = {
@@ -554,14 +1517,31 @@ class AbstractViews[T: type]:
     def copy_members_if_duplicates(self, source: T, excludes: list[str] | None = None) -> T:
         dest = cast("T", source.__class__())  # type: ignore[call-overload]
         insp = inspect(source.__class__)
+        source_state = inspect(source)
+        copy_in_database = self._duplicate_in_database and source_state.identity is not None
+        if copy_in_database:
+            colander_ext.BinaryDataCopy.mark(dest, source)
 
         for prop in insp.attrs:  # type: ignore[union-attr]
-            if isinstance(prop, ColumnProperty):
+            # The SQL expressions (like ContentAddressedFileData.data) are not stored, their columns are copied
+            if isinstance(prop, ColumnProperty) and isinstance(prop.columns[0], sqlalchemy.schema.Column):
                 is_primary_key = prop.columns[0].primary_key
                 to_duplicate = model_attr_info(prop.columns[0], "c2cgeoform", "duplicate", default=True)
                 to_exclude = excludes and prop.columns[0].key in excludes
                 if not is_primary_key and to_duplicate and not to_exclude:
-                    setattr(dest, prop.key, getattr(source, prop.key))
+                    if (
+                        copy_in_database
+                        and prop.deferred
+                        and prop.key in source_state.unloaded
+                        and isinstance(prop.columns[0].type, types.LargeBinary)
+                    ):
+                        # Copied by the INSERT, without loading the value
+                        value = colander_ext.BinaryDataCopy(source_state.identity).expression(
+                            source.__class__, prop.key
+                        )
+                    else:
+                        value = getattr(source, prop.key)
+                    setattr(dest, prop.key, value)
             if isinstance(prop, RelationshipProperty) and model_attr_info(
                 prop,
                 "c2cgeoform",
@@ -616,6 +1596,7 @@ class AbstractViews[T: type]:
             self._populate_widgets(form.schema)
             form_data = self._request.POST.items()
             self._appstruct = form.validate(form_data)
+            self._keep_unchanged_geometries(form, obj)
             with self._request.dbsession.no_autoflush:
                 obj = form.schema.objectify(self._appstruct, obj)
             self._obj = self._request.dbsession.merge(obj)
@@ -639,6 +1620,18 @@ class AbstractViews[T: type]:
                 "deform_dependencies": form.get_widget_resources(),
             }
 
+    def _keep_unchanged_geometries(self, form: Form, obj: T) -> None:
+        """Keep the stored geometries that are not modified, their serialization may have been rounded."""
+        assert self._appstruct is not None
+        for node in form.schema:
+            if (
+                isinstance(node.typ, colander_ext.Geometry)
+                and node.typ.max_decimal_digits is not None
+                and node.name in self._appstruct
+                and node.typ.is_unchanged(node, getattr(obj, node.name, None), form.cstruct.get(node.name))
+            ):
+                self._appstruct[node.name] = getattr(obj, node.name)
+
     def delete(self) -> DeleteResponse:
         obj = self._get_object()
         self._request.dbsession.delete(obj)
@@ -0,0 +1,205 @@
+import logging
+import tempfile
+from collections.abc import Iterator
+from typing import Any, ClassVar
+from urllib.parse import quote
+
+import pyramid.response
+import sqlalchemy.engine
+import sqlalchemy.orm
+import sqlalchemy.sql.expression
+from pyramid.httpexceptions import HTTPBadRequest, HTTPNotFound
+from sqlalchemy import Integer, bindparam, func, select
+
+from c2cgeoform import thumbnails
+from c2cgeoform.views.abstract_views import AbstractViews
+
+_LOGGER = logging.getLogger(__name__)
+
+_INVALID_THUMBNAIL_MSG = "Invalid thumbnail size or format"
+
+
+class FileChangedError(Exception):
+    """The file was updated or deleted while its content was read."""
+
+
+class _FileIter:
+    """
+    Read the content of a file from the database by chunks, with ``substring``.
+
+    Nothing is read before the iteration, and the reads use their own session since the response is
+    written after the end of the request transaction. Then the file can be updated or deleted in
+    between, the ``content`` query should select the file only with the hash sent in the ``ETag``: a
+    missing or a short chunk raises a ``FileChangedError``, and the server aborts the response
+    instead of sending a truncated or a mixed content.
+    """
+
+    def __init__(
+        self,
+        bind: sqlalchemy.engine.Connection | sqlalchemy.engine.Engine,
+        content: sqlalchemy.sql.expression.Select[Any],
+        start: int,
+        stop: int,
+        chunk_size: int,
+    ) -> None:
+        self._bind = bind
+        self._content = content
+        self._start = start
+        self._stop = stop
+        self._chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        with sqlalchemy.orm.Session(bind=self._bind) as session:
+            for offset in range(self._start, self._stop, self._chunk_size):
+                length = min(self._chunk_size, self._stop - offset)
+                # substring is 1-based
+                chunk = session.execute(self._content, {"offset": offset + 1, "length": length}).scalar()
+                if chunk is None or len(chunk) != length:
+                    _LOGGER.warning("The file was changed while it was read, at the offset %s", offset)
+                    raise FileChangedError
+                yield bytes(chunk)
+
+    def app_iter_range(self, start: int, stop: int) -> "_FileIter":
+        """Read only the bytes from ``start`` to ``stop``, used by WebOb for the ``Range`` requests."""
+        return _FileIter(self._bind, self._content, start, stop, self._chunk_size)
+
+
+class FileDataViews(AbstractViews[Any]):
+    """
+    Views to download the files of a model extending ``c2cgeoform.models.FileData``.
+
+    The content is streamed from the database by chunks of ``_file_chunk_size`` bytes, the ``Range``
+    and the conditional (``If-None-Match``) requests are supported. The images also have thumbnails.
+
+    Example usage
+
+    .. code-block:: python
+
+        @view_defaults(match_param="table=photos")
+        class PhotoViews(FileDataViews):
+            _model = Photo
+
+            @view_config(route_name="c2cgeoform_file", request_method="GET")
+            def download(self):
+                return super().download()
+
+            @view_config(route_name="c2cgeoform_thumbnail", request_method="GET")
+            def thumbnail(self):
+                return super().thumbnail()
+    """
+
+    _id_field = "id"
+    _file_chunk_size: ClassVar[int] = 1024 * 1024
+    _file_max_age: ClassVar[int] = 86400  # HTTP cache lifetime of the files, in seconds
+    _file_cache_public: ClassVar[bool] = False  # Let the shared HTTP caches store the files
+
+    _thumbnail_sizes: ClassVar[tuple[int, ...]] = (128, 512)  # Allowed sizes, the first is the default
+    _thumbnail_formats: ClassVar[tuple[str, ...]] = ("webp", "jpeg", "png")  # Idem for the formats
+
+    def download(self) -> pyramid.response.Response:
+        """Get the content of a file, with its name and its type."""
+        filename, mimetype, size, hash_ = self._file_info()
+        response = pyramid.response.Response(
+            app_iter=self._file_iter(size, hash_),
+            content_type=mimetype or "application/octet-stream",
+            content_length=size,
+            conditional_response=True,
+        )
+        response.etag = hash_
+        response.accept_ranges = "bytes"
+        if filename:
+            response.content_disposition = f"inline; filename*=UTF-8''{quote(filename)}"
+        self._cache_control(response)
+        return response
+
+    def thumbnail(self) -> pyramid.response.Response:
+        """
+        Get a thumbnail of an image, with the ``size`` and the ``format`` parameters.
+
+        The thumbnails are created on the first request (with Pillow) and cached on disk, see
+        ``c2cgeoform.thumbnails.get_thumbnail_cache``.
+        """
+        try:
+            size = int(self._request.params.get("size", self._thumbnail_sizes[0]))
+        except ValueError as exception:
+            raise HTTPBadRequest(_INVALID_THUMBNAIL_MSG) from exception
+        format_ = self._request.params.get("format", self._thumbnail_formats[0])
+        if size not in self._thumbnail_sizes or format_ not in self._thumbnail_formats:
+            raise HTTPBadRequest(_INVALID_THUMBNAIL_MSG)
+        if thumbnails.Image is None:
+            _LOGGER.warning("Pillow is not installed, the thumbnails are not available")
+            raise HTTPNotFound
+
+        _, mimetype, file_size, hash_ = self._file_info()
+        if not (mimetype or "").startswith("image/"):
+            raise HTTPNotFound
+        etag = f"{hash_}-{size}-{format_}"
+        response = pyramid.response.Response(
+            content_type=thumbnails.FORMATS[format_], conditional_response=True
+        )
+        response.etag = etag
+        self._cache_control(response)
+        if etag in self._request.if_none_match:
+            # Not created for the revalidations
+            response.status_int = 304
+            return response
+
+        cache = thumbnails.get_thumbnail_cache(self._request.registry.settings or {})
+        body = cache.get(hash_, size, format_)
+        if body is None:
+            with tempfile.SpooledTemporaryFile(max_size=self._file_chunk_size) as file_:
+                for chunk in self._file_iter(file_size, hash_):
+                    file_.write(chunk)
+                file_.seek(0)
+                try:
+                    body = thumbnails.make_thumbnail(file_, size, format_)
+                except (OSError, thumbnails.Image.DecompressionBombError) as exception:
+                    _LOGGER.warning("Unable to create the thumbnail of %s: %s", self._request.url, exception)
+                    raise HTTPNotFound from exception
+            cache.set(hash_, size, format_, body)
+        response.body = body
+        return response
+
+    def _file_condition(self) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+        assert self._id_field is not None
+        return getattr(self._model, self._id_field) == self._request.matchdict["id"]  # type: ignore[no-any-return]
+
+    def _file_info(self) -> tuple[str | None, str | None, int, str]:
+        """Get the name, the type, the size and the hash of the file."""
+        row = self._request.dbsession.execute(
+            select(
+                self._model.filename,  # type: ignore[union-attr]
+                self._model.mimetype,  # type: ignore[union-attr]
+                func.octet_length(self._model.data),  # type: ignore[union-attr]
+                self._file_hash(),
+            ).where(self._file_condition()),
+        ).one_or_none()
+        if row is None:
+            raise HTTPNotFound
+        return tuple(row)  # type: ignore[return-value]
+
+    def _file_hash(self) -> sqlalchemy.sql.expression.ColumnElement[str]:
+        # The hash is stored on write, only the rows written before the sha256 column was added are hashed
+        # by the database (the content is not transferred)
+        return func.coalesce(self._model.sha256, func.md5(self._model.data))  # type: ignore[union-attr,no-any-return]
+
+    def _file_iter(self, size: int, hash_: str) -> _FileIter:
+        content = select(
+            func.substring(
+                self._model.data,  # type: ignore[union-attr]
+                bindparam("offset", type_=Integer),
+                bindparam("length", type_=Integer),
+            ),
+        ).where(
+            self._file_condition(),
+            # Not the content of an updated file
+            self._file_hash() == hash_,
+        )
+        return _FileIter(self._request.dbsession.get_bind(), content, 0, size, self._file_chunk_size)
+
+    def _cache_control(self, response: pyramid.response.Response) -> None:
+        if self._file_cache_public:
+            response.cache_control.public = True
+        else:
+            response.cache_control.private = True
+        response.cache_control.max_age = self._file_max_age
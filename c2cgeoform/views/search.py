@@ -0,0 +1,247 @@
+import re
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy.orm
+import sqlalchemy.sql.expression
+from sqlalchemy import Numeric, cast, func, literal_column, or_, text
+
+if TYPE_CHECKING:
+    from c2cgeoform.views.abstract_views import ListField
+
+_CONFIG_RE = re.compile(r"^[a-z_][a-z0-9_]*(\.[a-z_][a-z0-9_]*)?$")
+
+# The access methods and operator classes of the indexes having the column as key or in their key
+# expressions
+_INDEX_OPCLASSES_SQL = """
+SELECT DISTINCT pg_am.amname, pg_opclass.opcname
+FROM pg_class
+JOIN pg_namespace ON pg_namespace.oid = pg_class.relnamespace
+JOIN pg_attribute ON pg_attribute.attrelid = pg_class.oid AND pg_attribute.attname = :column
+JOIN pg_index ON pg_index.indrelid = pg_class.oid
+CROSS JOIN LATERAL generate_series(0, pg_index.indnkeyatts - 1) AS key(position)
+JOIN pg_opclass ON pg_opclass.oid = pg_index.indclass[key.position]
+JOIN pg_am ON pg_am.oid = pg_opclass.opcmethod
+WHERE pg_namespace.nspname = coalesce(:schema, current_schema())
+    AND pg_class.relname = :table
+    AND (
+        pg_index.indkey[key.position] = pg_attribute.attnum
+        OR pg_index.indkey[key.position] = 0 AND EXISTS (
+            SELECT FROM pg_depend
+            WHERE pg_depend.classid = 'pg_class'::regclass
+                AND pg_depend.objid = pg_index.indexrelid
+                AND pg_depend.refobjid = pg_class.oid
+                AND pg_depend.refobjsubid = pg_attribute.attnum
+        )
+    )
+"""
+
+
+def _greatest(
+    expressions: list[sqlalchemy.sql.expression.ColumnElement[Any]],
+) -> sqlalchemy.sql.expression.ColumnElement[Any]:
+    return expressions[0] if len(expressions) == 1 else func.greatest(*expressions)
+
+
+def _rounded(
+    expression: sqlalchemy.sql.expression.ColumnElement[Any],
+) -> sqlalchemy.sql.expression.ColumnElement[Any]:
+    """
+    Round a ``real`` relevance to 6 decimals.
+
+    The keyset pagination cursors carry the sort values back to the database, the floating point values
+    would not compare equal to themselves there.
+    """
+    return func.round(cast(expression, Numeric), 6, type_=Numeric(asdecimal=False))
+
+
+def _function(name: str) -> Any:
+    """Get a SQL function from a possibly schema qualified name."""
+    function = func
+    for part in name.split("."):
+        function = getattr(function, part)
+    return function
+
+
+def _table_column(column: Any) -> sqlalchemy.schema.Column[Any] | None:
+    """Get the table column behind a filter column, ``None`` for other SQL expressions."""
+    if hasattr(column, "__clause_element__"):
+        column = column.__clause_element__()
+    column = getattr(column, "element", column)  # annotated columns
+    if isinstance(column, sqlalchemy.schema.Column) and isinstance(column.table, sqlalchemy.schema.Table):
+        return column
+    return None
+
+
+class SearchBackend:
+    """
+    Filter (and rank) the grid rows with the search phrase.
+
+    Set one on the ``_search_backend`` class attribute of the views.
+    """
+
+    def filter(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+        """Get the condition for the rows matching the phrase on one of the filtrable ``fields``."""
+        raise NotImplementedError
+
+    def rank(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[Any] | None:
+        """
+        Get the relevance of the rows for the phrase, used to sort them, ``None`` for no ordering.
+
+        The values should compare equal to themselves once sent back to the database, as in the keyset
+        pagination cursors, so ``real`` values should be rounded.
+        """
+        return None
+
+    def index_supports(self, method: str, opclass: str) -> bool:
+        """Check if an index of access ``method`` and operator class ``opclass`` can serve the filter."""
+        return False
+
+    def missing_indexes(
+        self,
+        dbsession: sqlalchemy.orm.Session,
+        fields: "list[ListField[Any]]",
+    ) -> list[str]:
+        """Get the filter columns of ``fields`` that have no index supporting this backend."""
+        missing = []
+        for field in fields:
+            column = _table_column(field.filter_column())
+            if column is None:
+                missing.append(str(field.filter_column()))
+                continue
+            opclasses = dbsession.execute(
+                text(_INDEX_OPCLASSES_SQL),
+                {"schema": column.table.schema, "table": column.table.name, "column": column.name},
+            ).all()
+            if not any(self.index_supports(method, opclass) for method, opclass in opclasses):
+                missing.append(f"{column.table.fullname}.{column.name}")
+        return missing
+
+
+class ILikeSearch(SearchBackend):
+    """
+    Match all the words of the phrase in order with ``ILIKE '%word1%word2%'``, the default.
+
+    Only trigram (``pg_trgm``) indexes can serve these conditions.
+    """
+
+    def filter(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+        term = "%" + "%".join(phrase.split()) + "%"
+        return or_(*[field.filter_expression(term) for field in fields])
+
+    def index_supports(self, method: str, opclass: str) -> bool:
+        return opclass in ("gin_trgm_ops", "gist_trgm_ops")
+
+
+class TrigramSearch(ILikeSearch):
+    """
+    Fuzzy search with the ``pg_trgm`` similarity operators, ordered by relevance.
+
+    With ``word_similarity``, the phrase is compared to the most similar part of the column values
+    (``%>`` operator), otherwise to the whole values (``%`` operator). The columns need a GIN (or GiST)
+    trigram index, e.g.:
+
+    .. code-block:: sql
+
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX ON excavation USING gin (description gin_trgm_ops);
+    """
+
+    def __init__(self, word_similarity: bool = True) -> None:
+        self._word_similarity = word_similarity
+
+    def filter(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+        operator = "%>" if self._word_similarity else "%"
+        return or_(*[field.filter_column().op(operator)(phrase) for field in fields])
+
+    def rank(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[Any] | None:
+        if self._word_similarity:
+            return _rounded(
+                _greatest([func.word_similarity(phrase, field.filter_column()) for field in fields]),
+            )
+        return _rounded(_greatest([func.similarity(field.filter_column(), phrase) for field in fields]))
+
+
+class FullTextSearch(SearchBackend):
+    """
+    Full-text search with ``tsvector``, ordered by relevance.
+
+    With ``prefix``, the last letters of the words can be omitted (``word:*``). With ``unaccent``, the
+    values and the phrase are passed through this function. ``unaccent`` from the extension of the same
+    name is not immutable, so to be indexed, it should be wrapped in an immutable function, e.g.:
+
+    .. code-block:: sql
+
+        CREATE EXTENSION IF NOT EXISTS unaccent;
+        CREATE FUNCTION f_unaccent(text) RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+            AS $$ SELECT public.unaccent('public.unaccent', $1) $$;
+        CREATE INDEX ON excavation USING gin (to_tsvector('simple'::regconfig, f_unaccent(description)));
+
+    with ``FullTextSearch(config="simple", unaccent="f_unaccent")``.
+    """
+
+    def __init__(
+        self,
+        config: str = "simple",
+        unaccent: str | None = "unaccent",
+        prefix: bool = True,
+    ) -> None:
+        # The configuration is rendered in the SQL to match the expression indexes
+        if not _CONFIG_RE.match(config):
+            message = f"Invalid text search configuration: {config}"
+            raise ValueError(message)
+        self._config = literal_column(f"'{config}'::regconfig")
+        self._unaccent = unaccent
+        self._prefix = prefix
+
+    def _unaccented(self, value: Any) -> Any:
+        return value if self._unaccent is None else _function(self._unaccent)(value)
+
+    def _vector(self, field: "ListField[Any]") -> sqlalchemy.sql.expression.ColumnElement[Any]:
+        return func.to_tsvector(self._config, self._unaccented(field.filter_column()))
+
+    def _query(self, phrase: str) -> sqlalchemy.sql.expression.ColumnElement[Any]:
+        if self._prefix:
+            # Quote the words so their punctuation is not interpreted as operators
+            words = [word.replace("\\", "\\\\").replace("'", "''") for word in phrase.split()]
+            return func.to_tsquery(self._config, self._unaccented(" & ".join(f"'{w}':*" for w in words)))
+        return func.websearch_to_tsquery(self._config, self._unaccented(phrase))
+
+    def filter(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[bool]:
+        query = self._query(phrase)
+        return or_(*[self._vector(field).op("@@")(query) for field in fields])
+
+    def rank(
+        self,
+        fields: "list[ListField[Any]]",
+        phrase: str,
+    ) -> sqlalchemy.sql.expression.ColumnElement[Any] | None:
+        query = self._query(phrase)
+        return _rounded(_greatest([func.ts_rank(self._vector(field), query) for field in fields]))
+
+    def index_supports(self, method: str, opclass: str) -> bool:
+        # On tsvector columns or to_tsvector expressions, btree indexes cannot serve @@
+        return method in ("gin", "gist") and opclass == "tsvector_ops"
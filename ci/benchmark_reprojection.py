@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare the reprojection of geometries with ``shapely.ops.transform`` and ``transform_geometry``.
+
+Also compare the creation of a transformer and the build of a form schema with a geometry, with and
+without the transformers cache of ``get_transformer``.
+
+Usage: ``python3 ci/benchmark_reprojection.py [--vertices 10 100 ...] [--repeat 5]``
+"""
+
+import argparse
+import timeit
+from collections.abc import Callable
+from unittest.mock import patch
+
+import colander
+import pyproj
+import shapely.ops
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from shapely.geometry.base import BaseGeometry
+
+from c2cgeoform.ext.colander_ext import Geometry
+from c2cgeoform.ext.pyproj_ext import get_transformer, transform_geometry
+
+SOURCE_SRID = 2056
+TARGET_SRID = 3857
+
+
+def _polygon(vertices: int) -> BaseGeometry:
+    # quad_segs is the number of segments per quarter circle
+    return Point(2600000, 1200000).buffer(1000, quad_segs=max(1, vertices // 4))
+
+
+def _milliseconds(function: Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def _new_transformer(source_srid: int, target_srid: int) -> pyproj.Transformer:
+    # Without the cache
+    return pyproj.Transformer.from_crs(source_srid, target_srid, always_xy=True)
+
+
+def _build_form() -> None:
+    schema = colander.SchemaNode(colander.Mapping())
+    schema.add(colander.SchemaNode(Geometry("POINT", srid=SOURCE_SRID, map_srid=TARGET_SRID), name="geom"))
+    # colanderalchemy and deform clone the schema nodes
+    schema.clone().serialize({"geom": from_shape(Point(2600000, 1200000), srid=SOURCE_SRID)})
+
+
+def _print_cache(repeat: int) -> None:
+    cached = _milliseconds(lambda: get_transformer(SOURCE_SRID, TARGET_SRID), repeat)
+    uncached = _milliseconds(lambda: _new_transformer(SOURCE_SRID, TARGET_SRID), repeat)
+    form_cached = _milliseconds(_build_form, repeat)
+    with patch("c2cgeoform.ext.pyproj_ext.get_transformer", new=_new_transformer):
+        form_uncached = _milliseconds(_build_form, repeat)
+    print(f"{'':>16} {'with cache':>13} {'without cache':>16}")
+    print(f"{'transformer':>16} {cached:>10.3f} ms {uncached:>13.3f} ms")
+    print(f"{'form build':>16} {form_cached:>10.3f} ms {form_uncached:>13.3f} ms")
+
+
+def main() -> None:
+    """
+    Print the time of a reprojection with both functions for each number of vertices.
+
+    Then the time of the creation of a transformer and of a form build, with and without the cache.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vertices", type=int, nargs="+", default=[10, 100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    transform = get_transformer(SOURCE_SRID, TARGET_SRID).transform
+    print(f"{'vertices':>10} {'shapely.ops.transform':>22} {'transform_geometry':>19}")
+    for vertices in args.vertices:
+        polygon = _polygon(vertices)
+        per_coordinate = _milliseconds(lambda: shapely.ops.transform(transform, polygon), args.repeat)  # noqa: B023
+        vectorized = _milliseconds(
+            lambda: transform_geometry(polygon, SOURCE_SRID, TARGET_SRID),  # noqa: B023
+            args.repeat,
+        )
+        print(f"{shapely.get_num_coordinates(polygon):>10} {per_coordinate:>19.3f} ms {vectorized:>16.3f} ms")
+    print()
+    _print_cache(args.repeat)
+
+
+if __name__ == "__main__":
+    main()